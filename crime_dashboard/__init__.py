@@ -0,0 +1 @@
+# Data and chart helpers for the crime dashboard (NewDashboard.py)
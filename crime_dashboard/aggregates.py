@@ -0,0 +1,65 @@
+# The numbers behind each chart page, as plain pandas frames. charts.py
+# draws them and api.py serves them as JSON, so the dashboard and the API
+# always show the same values. No Plotly here.
+from crime_dashboard.boxstats import box_statistics, outliers
+from crime_dashboard.sampling import downsample
+
+# The year the single-year pages show, and the year districts are ranked by
+SNAPSHOT_YEAR = 2023
+RANKING_YEAR = 2024
+
+
+def default_year(years):
+    # The year the scatter page starts with: the snapshot year, or the
+    # latest year when the data has no such year
+    return SNAPSHOT_YEAR if SNAPSHOT_YEAR in years else max(years)
+
+
+def crime_statistics_data(cube, crime_type, districts, weighting="mean"):
+    # "Crime Statistics": yearly rates (StatisticGroup, DistrictName, Year,
+    # CrimeRate), the average rate per district (ascending) and the districts
+    # ordered by their latest rate (descending); weighting as in segments.py
+    yearly = cube.slice(crime_type, districts=districts, weighting=weighting)
+
+    average = cube.average(crime_type, districts, weighting).rename("CrimeRate")
+    average = average.rename_axis("DistrictName").reset_index()
+    average = average.sort_values("CrimeRate", ascending=True)
+
+    ranking = cube.year_rates(crime_type, RANKING_YEAR, weighting).sort_values(ascending=False).index.tolist()
+    return yearly, average, ranking
+
+
+def education_crime_data(cube, crime_type, rate_column, weighting="mean"):
+    # "Education & Crime Analysis": DistrictName, the education rate and
+    # CrimeRate of the snapshot year, both in percent
+    crime_summary = cube.year_rates(crime_type, SNAPSHOT_YEAR, weighting).rename('CrimeRate') * 100
+    education_summary = cube.education_by_district[rate_column] * 100
+    combined = education_summary.to_frame().join(crime_summary, how='inner')
+    return combined.rename_axis('DistrictName').reset_index()
+
+
+def socio_economic_data(settlement_index, crime_type, with_statistics=True):
+    # "Socio-Economic Impact": the snapshot year's settlement rows of groups
+    # 1-9 and, with_statistics, the box statistics per group (see
+    # boxstats.py) and the rows outside the whiskers
+    # Remove group 10
+    rows = settlement_index.select([SNAPSHOT_YEAR], [crime_type], groups=lambda group: group < 10)
+
+    if not with_statistics:
+        return rows, None, None
+    # (rounded: float32 rates would otherwise serialize with noise digits)
+    stats = box_statistics(rows, 'SocioeconomicGroup', 'CrimeRate').round(6)
+    return rows, stats, outliers(rows, stats, 'SocioeconomicGroup', 'CrimeRate')
+
+
+def integrated_data(settlement_index, rate_column, crime_types, years=(SNAPSHOT_YEAR,), max_points=None):
+    # "Integrated Data Visuals": settlement rows of the selected years and
+    # crime types that have the education rate, groups 1-9; with max_points
+    # the cloud is thinned to at most that many points (the outliers of each
+    # crime type and year first, see sampling.py)
+    # Keep settlements with a value for the selected education rate
+    rows = settlement_index.select(years, crime_types, groups=lambda group: group < 10, rates=[rate_column])
+
+    if max_points:
+        rows = downsample(rows, rate_column, "CrimeRate", max_points, groups=["StatisticGroupEn", "Year"])
+    return rows
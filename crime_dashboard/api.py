@@ -0,0 +1,319 @@
+# Headless JSON API over the dashboard's aggregates, for consumers that want
+# the numbers rather than the charts. It reuses the app's cube, settlement
+# index and aggregation functions (crime_dashboard/aggregates.py), built once
+# per data version and shared by all requests.
+#
+#   GET /api/meta                  crime types, districts, years, education rates
+#   GET /api/crime-statistics      ?crime_type=&district=...&weighting=   yearly rate per district
+#   GET /api/education-crime       ?crime_type=&rate=&weighting=    crime vs education rate per district
+#   GET /api/socio-economic        ?crime_type=                     box statistics per group + outliers
+#   GET /api/settlements           ?crime_type=...&year=...&rate=&offset=&limit=   settlement points, paginated
+#
+# List parameters can be repeated or comma separated. Every response carries
+# an ETag derived from the data version, so a conditional GET
+# (If-None-Match) gets 304 Not Modified until the data changes; bodies are
+# gzip compressed when the client accepts it. Encoded responses are cached.
+#
+#   python -m crime_dashboard.api --port 8502
+import argparse
+import gzip
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from crime_dashboard import aggregates, hotswap, shared, tracing
+from crime_dashboard.cube import AggregateCube
+from crime_dashboard.data import education_translation
+from crime_dashboard.figure_cache import FigureCache, figure_key
+from crime_dashboard.joins import SettlementIndex
+from crime_dashboard.segments import WEIGHTINGS
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AggregateStore:
+    # The cube and settlement index of the current data version; a new
+    # version is built in the background and swapped in when ready (see
+    # hotswap.py), requests meanwhile get the previous one
+    def __init__(self):
+        self.reloader = hotswap.Reloader(shared.data_version, self.build)
+        # Keyed by data version, so entries of an old version just age out
+        self.responses = FigureCache(max_entries=512)
+        tracing.tracer.register_cache("api", self.responses.stats)
+
+    def build(self, version):
+        with tracing.span("data"):
+            education_df, crimes, _, _ = shared.load(version)
+            return AggregateCube(crimes, education_df), SettlementIndex(crimes, education_df)
+
+    def current(self):
+        version, (cube, settlement_index) = self.reloader.current()
+        return version, cube, settlement_index
+
+
+def number(value):
+    # JSON number without float32 noise; NaN becomes null
+    value = float(value)
+    return None if math.isnan(value) else round(value, 6)
+
+
+def values(params, name, default=None):
+    # All values of a repeated or comma separated parameter
+    items = [item.strip() for value in params.get(name, []) for item in value.split(",") if item.strip()]
+    return items or default
+
+
+def single(params, name, default=None):
+    items = params.get(name)
+    return items[-1] if items else default
+
+
+def choice(value, options, name):
+    if value not in options:
+        raise ApiError(400, f"unknown {name} {value!r}; expected one of: {', '.join(map(str, options))}")
+    return value
+
+
+def crime_type_param(params, cube):
+    return choice(single(params, "crime_type", "All Crimes"), cube.crime_types, "crime_type")
+
+
+def weighting_param(params):
+    # "mean" (of the settlements' rates) or "weighted" (by population)
+    return choice(single(params, "weighting", "mean"), WEIGHTINGS, "weighting")
+
+
+def rate_param(params, default):
+    return choice(single(params, "rate", default), list(education_translation), "rate")
+
+
+def integer(params, name, default, low, high):
+    value = single(params, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer") from None
+    if not low <= value <= high:
+        raise ApiError(400, f"{name} must be between {low} and {high}")
+    return value
+
+
+def meta(params, cube, settlement_index, version):
+    return {
+        "version": version,
+        "crime_types": cube.crime_types,
+        "districts": cube.districts,
+        "years": cube.years,
+        "education_rates": education_translation,
+        "weightings": list(WEIGHTINGS),
+        "endpoints": sorted(ROUTES),
+    }
+
+
+def crime_statistics(params, cube, settlement_index, version):
+    crime_type = crime_type_param(params, cube)
+    districts = [choice(district, cube.districts, "district")
+                 for district in values(params, "district", cube.districts)]
+    weighting = weighting_param(params)
+    yearly, average, ranking = aggregates.crime_statistics_data(cube, crime_type, districts, weighting)
+
+    years = sorted(int(year) for year in yearly["Year"].unique())
+    rates = {district: [None] * len(years) for district in yearly["DistrictName"].unique()}
+    for district, year, rate in zip(yearly["DistrictName"], yearly["Year"], yearly["CrimeRate"]):
+        rates[district][years.index(int(year))] = number(rate)
+    return {
+        "crime_type": crime_type,
+        "weighting": weighting,
+        "unit": "fraction",
+        "years": years,
+        "rates": rates,
+        "average": {district: number(rate) for district, rate in zip(average["DistrictName"], average["CrimeRate"])},
+        "ranking": [district for district in ranking if district in districts],
+    }
+
+
+def education_crime(params, cube, settlement_index, version):
+    crime_type = crime_type_param(params, cube)
+    rate = rate_param(params, "5UnitsMathematicsRate")
+    weighting = weighting_param(params)
+    combined = aggregates.education_crime_data(cube, crime_type, rate, weighting)
+    return {
+        "crime_type": crime_type,
+        "rate": rate,
+        "weighting": weighting,
+        "year": aggregates.SNAPSHOT_YEAR,
+        "unit": "percent",
+        "districts": [{"district": district, "crime_rate": number(crime_rate), "education_rate": number(education_rate)}
+                      for district, crime_rate, education_rate
+                      in zip(combined["DistrictName"], combined["CrimeRate"], combined[rate])],
+    }
+
+
+def socio_economic(params, cube, settlement_index, version):
+    crime_type = crime_type_param(params, cube)
+    _, stats, outlier_rows = aggregates.socio_economic_data(settlement_index, crime_type)
+    return {
+        "crime_type": crime_type,
+        "year": aggregates.SNAPSHOT_YEAR,
+        "unit": "fraction",
+        "groups": [{"group": int(group), "count": int(row["count"]),
+                    **{column: number(row[column]) for column in ("q1", "median", "q3", "lowerfence", "upperfence")}}
+                   for group, row in stats.iterrows()],
+        "outliers": [{"settlement": str(settlement), "group": int(group), "crime_rate": number(rate)}
+                     for settlement, group, rate in zip(outlier_rows["Settlement"],
+                                                        outlier_rows["SocioeconomicGroup"],
+                                                        outlier_rows["CrimeRate"])],
+    }
+
+
+def settlements(params, cube, settlement_index, version):
+    crime_types = [choice(crime_type, cube.crime_types, "crime_type")
+                   for crime_type in values(params, "crime_type", ["All Crimes"])]
+    try:
+        years = [int(year) for year in values(params, "year", [aggregates.SNAPSHOT_YEAR])]
+    except ValueError:
+        raise ApiError(400, "year must be an integer") from None
+    years = [choice(year, cube.years, "year") for year in years]
+    rate = rate_param(params, "EligibleForBagrutRate")
+    offset = integer(params, "offset", 0, 0, 10 ** 9)
+    limit = integer(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+
+    rows = aggregates.integrated_data(settlement_index, rate, crime_types, years)
+    page = rows.iloc[offset:offset + limit]
+    following = offset + limit < len(rows)
+    return {
+        "crime_types": crime_types,
+        "years": years,
+        "rate": rate,
+        "unit": "fraction",
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "next": ("/api/settlements?" + urlencode({"crime_type": ",".join(crime_types),
+                                                  "year": ",".join(map(str, years)), "rate": rate,
+                                                  "offset": offset + limit, "limit": limit})) if following else None,
+        "items": [{"settlement": str(settlement), "year": int(year), "crime_type": str(crime_type),
+                   "crime_rate": number(crime_rate), "education_rate": number(education_rate),
+                   "socioeconomic_group": int(group)}
+                  for settlement, year, crime_type, crime_rate, education_rate, group
+                  in zip(page["Settlement"], page["Year"], page["StatisticGroupEn"], page["CrimeRate"], page[rate],
+                         page["SocioeconomicGroup"])],
+    }
+
+
+# Path -> handler(params, cube, settlement_index, version) returning the payload
+ROUTES = {
+    "/api/meta": meta,
+    "/api/crime-statistics": crime_statistics,
+    "/api/education-crime": education_crime,
+    "/api/socio-economic": socio_economic,
+    "/api/settlements": settlements,
+}
+
+
+def encode(payload):
+    # (JSON body, gzip compressed body or None when too small to be worth it)
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CrimeDashboardAPI/1.0"
+    # Keep-alive: every response has a Content-Length
+    protocol_version = "HTTP/1.1"
+    store = None
+    quiet = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip("/") or "/")
+        if route is None:
+            self.send_json(404, {"error": f"unknown path {url.path}", "endpoints": sorted(ROUTES)})
+            return
+
+        params = parse_qs(url.query)
+        with tracing.tracer.rerun(f"API {url.path}"):
+            version, cube, settlement_index = self.store.current()
+            etag = f'W/"{version}"'
+            if self.not_modified(etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            key = figure_key(url.path, version, **{name: tuple(value) for name, value in params.items()})
+            try:
+                with tracing.span("build"):
+                    body, compressed = self.store.responses.get_or_build(
+                        key, lambda: encode(route(params, cube, settlement_index, version)))
+            except ApiError as error:
+                self.send_json(error.status, {"error": str(error)})
+                return
+            with tracing.span("render"):
+                self.send_body(200, body, compressed, etag)
+
+    def not_modified(self, etag):
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        tags = [tag.strip() for tag in header.split(",")]
+        # Weak comparison: W/"x" matches "x"
+        return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+    def send_json(self, status, payload):
+        self.send_body(status, *encode(payload))
+
+    def send_body(self, status, body, compressed, etag=None):
+        gzip_ok = compressed is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+            # Cacheable, but revalidated with the ETag before every use
+            self.send_header("Cache-Control", "no-cache")
+        if gzip_ok:
+            body = compressed
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8502, quiet=True):
+    handler = type("Handler", (ApiHandler,), {"store": AggregateStore(), "quiet": quiet})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboard's aggregates as JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, quiet=not args.verbose)
+    print(f"Serving the crime dashboard API on http://{args.host}:{args.port}/api/meta")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
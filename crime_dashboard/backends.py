@@ -0,0 +1,233 @@
+# Query backends behind the chart pages and the Overview.
+#
+# A backend answers the queries the pages make (crime_dashboard/aggregates.py
+# and the Overview), so the pages do not care where the rows live:
+#
+#   crime_types, districts, years   labels, in order of first appearance
+#   slice / average / year_rates    district rates (see cube.DistrictRates)
+#   education_by_district           district means of the education rates
+#   select(years, crime_types, districts, groups, rates)
+#                                   settlement rows joined with their education
+#                                   columns (see joins.SettlementIndex.select)
+#   yearly_totals()                 crimes per year (all crime types)
+#   education                       the education frame (one row per settlement)
+#
+# pandas   the whole crimes frame in memory, with the aggregate cube and the
+#          settlement index built on it (the default)
+# duckdb   SQL over the per-year Feather files of the storage cache
+#          (python -m crime_dashboard.storage). Year, crime type and district
+#          filters and the aggregations run in DuckDB, reading only the
+#          needed years and columns, so only small result frames reach
+#          Python and memory stays bounded however many years there are.
+#          Needs the duckdb package (pip install -r requirements.txt).
+#
+#   CRIME_DASHBOARD_BACKEND=duckdb streamlit run NewDashboard.py
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from crime_dashboard import storage
+from crime_dashboard.cube import DistrictRates, education_means
+from crime_dashboard.data import hebrew_crime_categories
+from crime_dashboard.figure_cache import FigureCache
+from crime_dashboard.joins import EDUCATION_COLUMNS
+
+BACKENDS = ("pandas", "duckdb")
+BACKEND = os.environ.get("CRIME_DASHBOARD_BACKEND", "pandas")
+
+# Memory DuckDB may use for a query before spilling to disk
+DUCKDB_MEMORY_LIMIT = os.environ.get("CRIME_DASHBOARD_DUCKDB_MEMORY", "1GB")
+
+
+def yearly_totals(crimes):
+    # Year -> crimes of all types (the "all crimes" rows, StatisticGroupKod == -2)
+    return crimes.loc[crimes["StatisticGroupKod"] == -2].groupby("Year")["Count"].sum()
+
+
+class PandasBackend:
+    # The in-memory frames with the app's aggregate cube and settlement index
+    def __init__(self, cube, settlement_index, education_df, crimes):
+        self.cube = cube
+        self.settlement_index = settlement_index
+        self.education = education_df
+        self.crimes = crimes
+        self.crime_types, self.districts, self.years = cube.crime_types, cube.districts, cube.years
+        self.education_by_district = cube.education_by_district
+
+    def slice(self, *args, **kwargs):
+        return self.cube.slice(*args, **kwargs)
+
+    def average(self, *args, **kwargs):
+        return self.cube.average(*args, **kwargs)
+
+    def year_rates(self, *args, **kwargs):
+        return self.cube.year_rates(*args, **kwargs)
+
+    def select(self, *args, **kwargs):
+        return self.settlement_index.select(*args, **kwargs)
+
+    def yearly_totals(self):
+        return yearly_totals(self.crimes)
+
+
+def import_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("The duckdb backend needs the duckdb package: pip install -r requirements.txt") from None
+    return duckdb
+
+
+def sql_list(values):
+    # Placeholders for an IN (...) list
+    return ", ".join("?" * len(values))
+
+
+class DuckDBBackend(DistrictRates):
+    def __init__(self, version=None, cache_dir=storage.CACHE_DIR):
+        duckdb = import_duckdb()
+        # The files of data version `version` (default: the current one,
+        # building the cache if the sources changed); the rows are then only
+        # read from its per-year files, which a newer build leaves in place
+        entries = storage.version_sources(version or storage.data_version(cache_dir), cache_dir)
+        self.paths = {int(key): storage.partition_path("crimes", partition, cache_dir)
+                      for key, partition in entries["crimes"].get("partitions", {}).items()}
+        if not self.paths:
+            raise RuntimeError(f"No partitioned crimes cache in {cache_dir}; run python -m crime_dashboard.storage")
+        self.connection = duckdb.connect(config={"memory_limit": DUCKDB_MEMORY_LIMIT})
+        self.education = storage.read_cache("education", entries["education"], cache_dir)
+        self.education_by_district = education_means(self.education)
+        self.set_labels()
+
+        # Settlement name -> education row (the last row of a name wins, as
+        # in joins.SettlementIndex)
+        names = self.education["Settlement"].astype(str)
+        self.education_rows = pd.Series(np.arange(len(names)), index=names.to_numpy())
+        self.education_rows = self.education_rows[~self.education_rows.index.duplicated(keep="last")]
+
+        # (crime type, weighting) -> district x year table, and its means;
+        # sessions asking for the same table at once share one query
+        self.tables = FigureCache(max_entries=64)
+
+    def set_labels(self):
+        # One year's label columns at a time (memory-mapped), in year order:
+        # labels in order of first appearance, like AggregateCube
+        crime_types, districts = {}, {}
+        for year, path in sorted(self.paths.items()):
+            table = feather.read_table(path, columns=["StatisticGroup", "StatisticGroupEn", "DistrictNameEn"],
+                                       memory_map=True)
+            labels = table.to_pandas()
+            shown = labels[~labels["StatisticGroup"].isin(hebrew_crime_categories)]
+            crime_types.update(dict.fromkeys(shown["StatisticGroupEn"].unique().astype(str).tolist()))
+            districts.update(dict.fromkeys(shown["DistrictNameEn"].unique().astype(str).tolist()))
+        self.crime_types, self.districts, self.years = list(crime_types), list(districts), sorted(self.paths)
+
+        # Column dtypes of the cached frame (all partitions share their
+        # categories), so query results look like rows of the pandas frame
+        self.dtypes = feather.read_table(self.paths[self.years[0]], memory_map=True).slice(0, 0).to_pandas().dtypes
+
+    def query(self, sql, parameters=(), years=None):
+        # DataFrame of `sql` over a `crimes` view of the given years' files
+        # (pyarrow.dataset is imported here: it is slow to import and only
+        # this backend needs it)
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset([self.paths[year] for year in sorted(years or self.paths) if year in self.paths],
+                             format="ipc")
+        cursor = self.connection.cursor()
+        try:
+            cursor.register("crimes", dataset)
+            return cursor.execute(sql, list(parameters)).df()
+        finally:
+            cursor.close()
+
+    def district_tables(self, crime_type, weighting="mean"):
+        # (district x year table, its mean per district); None when the
+        # crime type has no rows
+        return self.tables.get_or_build((crime_type, weighting),
+                                        lambda: self.query_district_tables(crime_type, weighting))
+
+    def query_district_tables(self, crime_type, weighting):
+        if weighting not in ("mean", "weighted"):
+            raise ValueError(f"unknown weighting {weighting!r}")
+        hidden = list(hebrew_crime_categories)
+        if weighting == "weighted":
+            # Over all residents of the district: the "all crimes" rows
+            # (StatisticGroupKod = -2) list every settlement once per year
+            rates = self.query("SELECT DistrictNameEn, Year, SUM(Count) FILTER (WHERE StatisticGroupEn = ?) / "
+                               "SUM(NumResidents) FILTER (WHERE StatisticGroupKod = -2) AS CrimeRate FROM crimes "
+                               "WHERE (StatisticGroupEn = ? OR StatisticGroupKod = -2) "
+                               f"AND StatisticGroup NOT IN ({sql_list(hidden)}) AND DistrictNameEn IS NOT NULL "
+                               "GROUP BY DistrictNameEn, Year HAVING COUNT(*) FILTER (WHERE StatisticGroupEn = ?) > 0",
+                               [crime_type, crime_type, *hidden, crime_type])
+        else:
+            rates = self.query("SELECT DistrictNameEn, Year, AVG(CrimeRate) AS CrimeRate FROM crimes "
+                               f"WHERE StatisticGroupEn = ? AND StatisticGroup NOT IN ({sql_list(hidden)}) "
+                               "AND DistrictNameEn IS NOT NULL GROUP BY DistrictNameEn, Year",
+                               [crime_type, *hidden])
+        if rates.empty:
+            return None
+        # Same layout as cube.rate_tables: districts in category order,
+        # years ascending, float32 rates
+        table = rates.pivot(index="DistrictNameEn", columns="Year", values="CrimeRate").astype("float32")
+        order = [district for district in self.dtypes["DistrictNameEn"].categories.astype(str)
+                 if district in table.index]
+        table = table.reindex(index=order, columns=sorted(table.columns))
+        table.index = pd.Index(table.index.astype(str), name="DistrictNameEn")
+        table.columns = pd.Index(table.columns.astype(self.dtypes["Year"]), name="Year")
+        return table, table.mean(axis=1)
+
+    def district_table(self, crime_type, weighting="mean"):
+        tables = self.district_tables(crime_type, weighting)
+        return None if tables is None else tables[0]
+
+    def district_mean(self, crime_type, weighting="mean"):
+        tables = self.district_tables(crime_type, weighting)
+        return None if tables is None else tables[1]
+
+    def select(self, years, crime_types, districts=None, groups=None, rates=()):
+        # The settlement filters (socio-economic group, education rates) are
+        # applied to the small education frame; the crime rows are filtered
+        # in DuckDB and joined here
+        years, crime_types = [int(year) for year in years], list(crime_types)
+        education = self.education
+        keep = np.ones(len(education), dtype=bool)
+        if groups is not None:
+            group_values = education["SocioeconomicGroup"]
+            keep &= group_values.map(groups).to_numpy(dtype=bool) if callable(groups) else \
+                group_values.isin(list(groups)).to_numpy()
+        for rate in rates:
+            keep &= education[rate].notna().to_numpy()
+        settlements = [name for name, row in self.education_rows.items() if keep[row]]
+
+        if not years or not crime_types or not settlements:
+            rows = pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in self.dtypes.items()})
+        else:
+            where = [f"Year IN ({sql_list(years)})", f"StatisticGroupEn IN ({sql_list(crime_types)})",
+                     f"Settlement IN ({sql_list(settlements)})"]
+            parameters = [*years, *crime_types, *settlements]
+            if districts is not None:
+                where.append(f"DistrictNameEn IN ({sql_list(districts)})")
+                parameters += list(districts)
+            rows = self.query(f"SELECT * FROM crimes WHERE {' AND '.join(where)} ORDER BY Settlement",
+                              parameters, years)
+            # Ordered by year and crime type as listed (a type listed twice
+            # comes twice), then by settlement: the order of the source CSV,
+            # which the pandas backend keeps
+            positions = rows.groupby(["Year", "StatisticGroupEn"], sort=False).indices
+            order = [positions[year, crime_type] for year in years for crime_type in crime_types
+                     if (year, crime_type) in positions]
+            order = np.concatenate(order) if order else np.array([], dtype="int64")
+            rows = rows.iloc[order].reset_index(drop=True).astype(self.dtypes)
+
+        joined = self.education_rows.reindex(rows["Settlement"].astype(str).to_numpy()).to_numpy()
+        education_columns = education[EDUCATION_COLUMNS].iloc[joined].reset_index(drop=True)
+        return pd.concat([rows, education_columns], axis=1)
+
+    def yearly_totals(self):
+        totals = self.query("SELECT Year, CAST(SUM(Count) AS BIGINT) AS Count FROM crimes "
+                            "WHERE StatisticGroupKod = -2 GROUP BY Year ORDER BY Year")
+        return pd.Series(totals["Count"].to_numpy(), index=pd.Index(totals["Year"].astype(self.dtypes["Year"])),
+                         name="Count")
@@ -0,0 +1,438 @@
+# Headless benchmark of the dashboard's loaders and page builders.
+#
+# NewDashboard.py and the page modules are imported with a stand-in
+# `streamlit` module whose widgets return the selections of a benchmark case,
+# so every page can be run without a browser. Besides the real data the cases
+# run on synthetic datasets scaled 10x and 100x (settlements copied under new
+# names with jittered counts). The report also carries the startup import
+# times (crime_dashboard/startup.py).
+#
+#   python -m crime_dashboard.bench --output bench.json
+#   python -m crime_dashboard.bench --compare bench.json    # exit 1 on regressions
+import argparse
+import contextlib
+import functools
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from crime_dashboard import hotswap, shared, startup, storage, summary
+
+APP_MODULE = "NewDashboard"
+# Modules that import streamlit, re-imported against the stand-in
+STREAMLIT_MODULES = (APP_MODULE, "crime_dashboard.views")
+SCALES = (1, 10, 100)
+
+# Widget selections per page; labels are the widget labels in NewDashboard.py
+# and a missing label keeps the widget's default
+PAGE_CASES = {
+    "matala1": [
+        ("default", {}),
+        ("property-all-districts", {"Select Type of Crime:": "Property Offenses", "Select Districts:": "*"}),
+        ("no-districts", {"Select Districts:": []}),
+        ("population-weighted", {"District rate:": "weighted"}),
+    ],
+    "matala2": [
+        ("default", {}),
+        ("fraud-dropout", {"Select Type of Crime": "Fraud Offenses", "Select Education Metric": "Dropout of School"}),
+    ],
+    "matala3": [
+        ("default", {}),
+        ("all-points", {"Show all settlements": True}),
+        ("sex-offenses", {"Select Crime Type:": "Sex Offenses"}),
+    ],
+    "matala4": [
+        ("default", {}),
+        ("all-years-all-types", {"Select Years:": "*", "Select Crime Types:": "*"}),
+        ("all-years-all-types-unthinned", {"Select Years:": "*", "Select Crime Types:": "*",
+                                           "Thin out dense views": False}),
+    ],
+    "matala5": [
+        ("default", {}),
+        ("spearman-weighted-2023", {"Select Year:": 2023, "Select Method:": "spearman", "Weight by population": True}),
+    ],
+}
+
+
+class _Element:
+    # Stand-in for the streamlit module, st.sidebar, columns and containers:
+    # layout calls return more elements, widgets return the case's selection
+    def __init__(self, selections):
+        self._selections = selections
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: _Element(self._selections)
+
+    def _choice(self, label, default, options=None):
+        # The case's selection for the widget, which must be one of its
+        # options (a misspelled option would silently benchmark the default)
+        for key, value in self._selections.items():
+            if label.startswith(key):
+                chosen = value if isinstance(value, list) else [value]
+                missing = [item for item in chosen if options is not None and item not in options]
+                if missing:
+                    raise ValueError(f"{label!r} has no option {missing[0]!r}; options: {options}")
+                return value
+        return default
+
+    def columns(self, spec, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [_Element(self._selections) for _ in range(count)]
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        return self._choice(label, list(options)[index], list(options))
+
+    def radio(self, label, options, index=0, **kwargs):
+        return self._choice(label, list(options)[index], list(options))
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        value = self._choice(label, list(default or []), list(options) + ["*"])
+        return list(options) if value == "*" else value
+
+    def checkbox(self, label, value=False, **kwargs):
+        return self._choice(label, value)
+
+    def select_slider(self, label, options, value=None, **kwargs):
+        return self._choice(label, list(options)[0] if value is None else value, list(options))
+
+    def plotly_chart(self, figure, *args, **kwargs):
+        # Serialize like st.plotly_chart does, and count the payload
+        self._selections.payload_bytes += len(pio.to_json(figure, validate=False))
+        return _Element(self._selections)
+
+
+class Selections(dict):
+    payload_bytes = 0
+
+
+class StreamlitStub(_Element):
+    def __init__(self):
+        super().__init__(Selections())
+        self.sidebar = _Element(self._selections)
+
+    def select(self, selections):
+        self._selections.clear()
+        self._selections.update(selections)
+        self._selections.payload_bytes = 0
+
+    @property
+    def payload_bytes(self):
+        return self._selections.payload_bytes
+
+    def _cache(self, func=None, **kwargs):
+        # st.cache_resource / st.cache_data as a plain memo with .clear()
+        def decorate(func):
+            results = {}
+
+            @functools.wraps(func)
+            def cached(*args):
+                if args not in results:
+                    results[args] = func(*args)
+                return results[args]
+
+            cached.clear = results.clear
+            return cached
+
+        return decorate(func) if func is not None else decorate
+
+    cache_resource = _cache
+    cache_data = _cache
+
+    def fragment(self, func=None, **kwargs):
+        # Fragments run inline, as in a full rerun
+        return func if func is not None else (lambda func: func)
+
+
+@contextlib.contextmanager
+def stubbed_app():
+    # Import the app against the stand-in streamlit module
+    def app_modules():
+        return [name for name in sys.modules if name == "streamlit" or name.startswith(STREAMLIT_MODULES)]
+
+    saved = {name: sys.modules.pop(name) for name in app_modules()}
+    stub = StreamlitStub()
+    sys.modules["streamlit"] = stub
+    try:
+        yield importlib.import_module(APP_MODULE), stub
+    finally:
+        for name in app_modules():
+            sys.modules.pop(name)
+        sys.modules.update(saved)
+
+
+def scaled_frames(education_df, crimes, scale, seed=0):
+    # Copy every settlement `scale` times under a new name; counts are
+    # jittered per copy so the rates differ but stay consistent per settlement
+    if scale == 1:
+        return education_df, crimes
+    rng = np.random.default_rng(seed)
+    education_parts, crime_parts = [education_df], [crimes]
+    rate_columns = [column for column in education_df.columns if column.endswith("Rate")]
+    for copy in range(1, scale):
+        names = {name: f"{name} {copy}" for name in education_df["Settlement"].astype(str)}
+        names.update({name: f"{name} {copy}" for name in crimes["Settlement"].astype(str).unique()})
+
+        education = education_df.copy()
+        education["Settlement"] = education["Settlement"].astype(str).map(names)
+        for column in rate_columns:
+            jitter = rng.normal(1, 0.1, len(education)).astype("float32")
+            education[column] = (education[column] * jitter).clip(0, 1)
+        education_parts.append(education)
+
+        factors = pd.Series(rng.uniform(0.7, 1.3, len(names)), index=list(names))
+        copied = crimes.copy()
+        settlement = copied["Settlement"].astype(str)
+        copied["Count"] = (copied["Count"] * settlement.map(factors).to_numpy()).round().astype("int32")
+        copied["CrimeRate"] = (copied["Count"] / copied["NumResidents"]).astype("float32")
+        copied["Settlement"] = settlement.map(names)
+        crime_parts.append(copied)
+
+    def combine(parts):
+        frame = pd.concat([part.astype({"Settlement": str}) for part in parts], ignore_index=True)
+        for column in frame.columns:
+            if column != "Settlement" and isinstance(parts[0][column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(parts[0][column].dtype)
+        frame["Settlement"] = frame["Settlement"].astype("category")
+        return frame
+
+    return combine(education_parts), combine(crime_parts)
+
+
+@contextlib.contextmanager
+def synthetic_source(education_df, crimes, scale):
+    # Point the app's loader at Feather files of the scaled data
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        education, scaled_crimes = scaled_frames(education_df, crimes, scale)
+        paths = {name: os.path.join(tmp_dir, f"{name}.feather") for name in ("education", "crimes")}
+        storage.write_frame(education, paths["education"])
+        storage.write_frame(scaled_crimes, paths["crimes"])
+        numbers = summary.summarize(education, scaled_crimes)
+
+        patched = {
+            # No partition versions: the cube is always built in full
+            "load_version": lambda *args: (storage.read_frame(paths["education"]), storage.read_frame(paths["crimes"]),
+                                           {}),
+            "data_version": lambda *args: f"synthetic-{scale}x",
+            # The Overview numbers the cache manifest would carry
+            "read_summary": lambda *args, **kwargs: numbers,
+        }
+        saved = {name: getattr(storage, name) for name in patched}
+        for name, function in patched.items():
+            setattr(storage, name, function)
+        try:
+            yield len(education), len(scaled_crimes)
+        finally:
+            for name, function in saved.items():
+                setattr(storage, name, function)
+
+
+def measure(run, setup, repeat):
+    # Wall time over `repeat` runs (after one untimed warm-up run), then one
+    # traced run for the peak memory and the net number of memory blocks it
+    # left allocated (blocks allocated minus blocks freed)
+    setup()
+    run()
+
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "repeat": repeat,
+        "wall_time": {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times)},
+        "peak_bytes": peak,
+        "net_blocks": blocks,
+    }
+
+
+def scale_cases(app, stub):
+    # (name, setup, run) for every benchmarked call of one dataset
+    views = importlib.import_module("crime_dashboard.views")
+    common = importlib.import_module("crime_dashboard.views.common")
+    overview = views.load_page("Overview")
+    # Figures are always built here, never read from a prerendered bundle
+    common.load_bundle = lambda version, stamp: {}
+
+    def version():
+        return storage.data_version()
+
+    # Reruns probe the data version themselves (no reload thread), so every
+    # scale is shown as its own version
+    reloader = hotswap.Reloader(shared.data_version, common.load_backend, interval=0, build_first=False)
+    common.get_reloader = lambda: reloader
+
+    def clear_data():
+        for loader in (common.load_data, common.load_cube, common.load_settlement_index, common.load_backend,
+                       common.load_summary):
+            loader.clear()
+        common.get_figure_cache().clear()
+
+    def warm():
+        common.load_backend(version())
+
+    def cold_figures():
+        warm()
+        common.get_figure_cache().clear()
+
+    cases = [
+        ("load_data", clear_data, lambda: common.load_data(version())),
+        ("load_cube", lambda: (common.load_cube.clear(), common.load_data(version())), lambda: common.load_cube(version())),
+        ("load_settlement_index", lambda: (common.load_settlement_index.clear(), common.load_data(version())),
+         lambda: common.load_settlement_index(version())),
+        ("load_summary", clear_data, lambda: common.load_summary(version())),
+        ("render_overview_crime", lambda: common.load_summary(version()),
+         lambda: overview.render_overview_crime(common.load_summary(version())["years"])),
+        ("render_overview_education", lambda: common.load_summary(version()),
+         lambda: overview.render_overview_education(common.load_summary(version())["groups"])),
+        ("render_min_max_general_rates", lambda: common.load_summary(version()),
+         lambda: overview.render_min_max_general_rates(common.load_summary(version())["features"])),
+    ]
+
+    crime_statistics = views.load_page("Crime Statistics")
+    education_crime = views.load_page("Education & Crime Analysis")
+    socio_economic = views.load_page("Socio-Economic Impact")
+    integrated = views.load_page("Integrated Data Visuals")
+    correlations = views.load_page("Correlation Analysis")
+    pages = {
+        "matala1": lambda: crime_statistics.matala1(common.load_labels(version())),
+        "matala2": lambda: education_crime.matala2(),
+        "matala3": lambda: socio_economic.matala3(common.load_labels(version())),
+        "matala4": lambda: integrated.matala4(common.load_labels(version())),
+        "matala5": lambda: correlations.matala5(common.load_labels(version())),
+    }
+    for page, selections in PAGE_CASES.items():
+        for tag, chosen in selections:
+            def setup(chosen=chosen):
+                stub.select(chosen)
+                cold_figures()
+            cases.append((f"{page}[{tag}]", setup, pages[page]))
+
+    # The landing page (first in the sidebar) in a fresh process: nothing
+    # loaded yet
+    def first_paint():
+        stub.select({"Go to": next(iter(views.PAGES))})
+        clear_data()
+
+    cases.append(("main[first paint]", first_paint, app.main))
+
+    # A full rerun of main() with the caches warm, as after a widget change
+    for page in views.PAGES:
+        def setup(page=page):
+            stub.select({"Go to": page})
+            warm()
+            app.main()
+        cases.append((f"main[{page}]", setup, app.main))
+    return cases
+
+
+def run(scales=SCALES, repeat=5, cases=None):
+    education_df, crimes = storage.load_data()
+    report = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "scales": list(scales),
+        "startup": startup.report(),
+        "results": {},
+    }
+
+    with stubbed_app() as (app, stub):
+        for scale in scales:
+            with synthetic_source(education_df, crimes, scale) as (education_rows, crime_rows):
+                print(f"{scale}x: {education_rows} settlements, {crime_rows} crime rows", file=sys.stderr)
+                for name, setup, call in scale_cases(app, stub):
+                    if cases and not any(name.startswith(prefix) for prefix in cases):
+                        continue
+                    result = measure(call, setup, repeat)
+                    result["payload_bytes"] = stub.payload_bytes
+                    report["results"][f"{scale}x/{name}"] = result
+                    print(f"  {name}: {result['wall_time']['min'] * 1000:.1f} ms", file=sys.stderr)
+    return report
+
+
+def compare(baseline, current, threshold=0.25, min_time=0.002, min_bytes=1 << 20):
+    # Cases whose best time or peak memory grew by more than `threshold`
+    # (and by more than the absolute noise floors) since the baseline; the
+    # minimum is compared because it is the least sensitive to machine noise
+    regressions = []
+    if "startup" in baseline:
+        # Import times are noisier, so they get a larger absolute floor
+        before, after = baseline["startup"], current["startup"]
+        imports = [("startup/core", before["core"], after["core"])]
+        imports += [(f"startup/{page}", before["pages"][page], seconds)
+                    for page, seconds in after["pages"].items() if page in before["pages"]]
+        for name, previous, seconds in imports:
+            if seconds > previous * (1 + threshold) and seconds - previous > 0.05:
+                regressions.append({"case": name, "metric": "import_time", "baseline": previous, "current": seconds})
+
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        checks = [
+            ("wall_time", previous["wall_time"]["min"], result["wall_time"]["min"], min_time),
+            ("peak_bytes", previous["peak_bytes"], result["peak_bytes"], min_bytes),
+        ]
+        for metric, before, after, floor in checks:
+            if after > before * (1 + threshold) and after - before > floor:
+                regressions.append({"case": name, "metric": metric, "baseline": before, "current": after})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard loaders and page builders")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", help="only run cases starting with this name (repeatable)")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON report; exit with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeat, args.case)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for item in regressions:
+            print(f"REGRESSION {item['case']} {item['metric']}: {item['baseline']:.4g} -> {item['current']:.4g}")
+        print(f"{len(regressions)} regression(s) against {args.compare}")
+        sys.exit(1 if regressions else 0)
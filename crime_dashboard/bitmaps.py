@@ -0,0 +1,90 @@
+# Bitmap row indexes: one packed bitset per value of each filterable column.
+#
+# A bitmap has one bit per row, packed into uint64 words. A filter such as
+# "these years, these crime types, socio-economic groups below 10" is an OR
+# of the values' bitmaps per column and an AND across columns, i.e. a few
+# word-wise operations over rows / 64 words, without building a boolean
+# mask or an intermediate frame per condition. Row positions are then read
+# only from the non-zero words, so turning a selective filter into positions
+# costs about the size of the result.
+import numpy as np
+import pandas as pd
+
+
+def pack(mask):
+    # Boolean array -> bitmap (uint64 words; bits past the end are 0)
+    padded = np.zeros(-(-len(mask) // 64) * 64, dtype=bool)
+    padded[:len(mask)] = mask
+    return np.packbits(padded, bitorder="little").view(np.uint64)
+
+
+def frame_columns(frame, names):
+    # name -> (codes, values) of frame columns: categorical codes, else
+    # factorized values (missing values get -1)
+    columns = {}
+    for name in names:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            columns[name] = (column.cat.codes.to_numpy(), column.cat.categories.tolist())
+        else:
+            codes, values = pd.factorize(column, sort=True)
+            columns[name] = (codes, values.tolist())
+    return columns
+
+
+def flag(mask):
+    # (codes, values) of a yes/no column: only the rows with True are indexed
+    return np.where(mask, 0, -1), [True]
+
+
+class BitmapIndex:
+    def __init__(self, columns, length):
+        # columns: name -> (codes, values); codes is one integer per row
+        # indexing `values`, -1 for rows without a value
+        self.length = length
+        self.bitmaps = {}
+        for name, (codes, values) in columns.items():
+            codes = np.asarray(codes)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            bitmaps = {}
+            for code, value in enumerate(values):
+                rows = order[bounds[code]:bounds[code + 1]]
+                if len(rows):
+                    mask = np.zeros(length, dtype=bool)
+                    mask[rows] = True
+                    bitmaps[value] = pack(mask)
+            self.bitmaps[name] = bitmaps
+        self.empty = np.zeros(-(-length // 64), dtype=np.uint64)
+
+    def bitmap(self, name, values):
+        # Rows with any of `values` in column `name`; `values` may also be a
+        # predicate on a single value
+        bitmaps = self.bitmaps[name]
+        if callable(values):
+            values = [value for value in bitmaps if values(value)]
+        selected = [bitmaps[value] for value in values if value in bitmaps]
+        if not selected:
+            return self.empty.copy()
+        return np.bitwise_or.reduce(selected) if len(selected) > 1 else selected[0].copy()
+
+    def select(self, **filters):
+        # AND of one bitmap() per column; None leaves a column unfiltered
+        result = None
+        for name, values in filters.items():
+            if values is None:
+                continue
+            bitmap = self.bitmap(name, values)
+            result = bitmap if result is None else np.bitwise_and(result, bitmap, out=result)
+        if result is None:
+            # No filter: every row
+            result = pack(np.ones(self.length, dtype=bool))
+        return result
+
+    @staticmethod
+    def positions(bitmap):
+        # Sorted row positions of the set bits, unpacking only non-zero words
+        words = np.flatnonzero(bitmap)
+        bits = np.unpackbits(bitmap[words].view(np.uint8), bitorder="little").reshape(-1, 64)
+        word, bit = np.nonzero(bits)
+        return words[word] * 64 + bit
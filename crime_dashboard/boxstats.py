@@ -0,0 +1,29 @@
+# Box plot statistics computed on the server, so the socio-economic box plot
+# only sends five numbers per box plus the real outliers to the browser.
+import numpy as np
+import pandas as pd
+
+STAT_COLUMNS = ["count", "q1", "median", "q3", "lowerfence", "upperfence"]
+
+
+def box_statistics(frame, group_column, value_column):
+    # Quartiles (linear interpolation, Plotly's default quartile method) and
+    # Tukey whiskers: the most extreme values within 1.5 IQR of the box
+    rows = {}
+    for group, values in frame.groupby(group_column, observed=True)[value_column]:
+        values = np.sort(values.dropna().to_numpy(dtype="float64"))
+        if len(values) == 0:
+            continue
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        rows[group] = [len(values), q1, median, q3, inside[0], inside[-1]]
+    return pd.DataFrame.from_dict(rows, orient="index", columns=STAT_COLUMNS)
+
+
+def outliers(frame, stats, group_column, value_column):
+    # Rows outside their group's whiskers
+    fences = stats[["lowerfence", "upperfence"]].reindex(frame[group_column].to_numpy())
+    values = frame[value_column].to_numpy()
+    outside = (values < fences["lowerfence"].to_numpy()) | (values > fences["upperfence"].to_numpy())
+    return frame[outside]
@@ -0,0 +1,369 @@
+# Figure builders for the four analysis pages. They take the shared
+# aggregates (cube / settlement index) and the widget selections and return
+# Plotly figures, so the pages can cache them per selection.
+import plotly.express as px
+import plotly.graph_objects as go
+
+from crime_dashboard import aggregates, tracing
+from crime_dashboard.data import education_translation
+
+# Scatter plots with more points than this are drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Define a colorblind-friendly color palette (Set2 from ColorBrewer)
+color_palette = [
+    "#66c2a5", "#fc8d62", "#8da0cb",
+    "#e78ac3", "#a6d854", "#ffd92f",
+    "#e5c494", "#b3b3b3", "#1f78b4"
+]
+
+
+def crime_statistics_figures(cube, crime_type, districts, weighting="mean"):
+    # Mini bar chart of the average rate per district and the yearly line
+    # chart (None when nothing is selected) for "Crime Statistics"
+    with tracing.span("aggregate"):
+        filtered_data, avg_crime_rate_by_district, sorted_districts = aggregates.crime_statistics_data(
+            cube, crime_type, districts, weighting)
+
+    color_mapping = {district: color for district, color in zip(cube.districts, px.colors.qualitative.Set2)}
+
+    fig_mini = px.bar(
+        avg_crime_rate_by_district,
+        y="DistrictName",
+        x="CrimeRate",
+        color="DistrictName",
+        color_discrete_map=color_mapping,
+        labels={"CrimeRate": "Average Crime Rate", "DistrictName": "District Name"},
+    )
+
+    fig_mini.update_layout(
+        xaxis=dict(
+            title="Average Crime Rate",
+            tickformat=".2%",
+            title_font=dict(size=13),
+            tickfont=dict(size=12),
+            tickangle=45,
+        ),
+        yaxis=dict(
+            title="District Name",
+            tickmode="linear",
+            dtick=1,
+            title_font=dict(size=13),
+            tickfont=dict(size=12)
+        ),
+        title={
+            'text': "Average Crime Rate",
+            'x': 0.5,
+            'y': 0.69,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': {'size': 14}
+        },
+        margin=dict(l=40, r=40, t=170, b=20),
+        height=400,
+        showlegend=False,
+    )
+
+    if filtered_data.empty:
+        return fig_mini, None
+
+    fig = px.line(
+        filtered_data,
+        x="Year",
+        y="CrimeRate",
+        color="DistrictName",
+        color_discrete_map=color_mapping,
+        category_orders={"DistrictName": sorted_districts},
+        labels={"CrimeRate": "Crime Rate (%)", "Year": "Year"},
+        title="Crime Rate by Year for Selected Districts and Crime Type",
+    )
+
+    fig.update_traces(line=dict(width=4))
+
+    fig.update_layout(
+        title={
+            'text': "Crime Rate by Year for Selected Districts and Crime Type",
+            'font': {'size': 18},
+            'x': 0.5,
+            'xanchor': 'center',
+        },
+        legend=dict(title="Districts", font=dict(size=14)),
+        xaxis=dict(
+            title="Year",
+            tickmode="linear",
+            dtick=1,
+            title_font=dict(size=18),
+            tickfont=dict(size=16)
+        ),
+        yaxis=dict(
+            title="Crime Rate",
+            tickformat=".2%",
+            title_font=dict(size=18),
+            tickfont=dict(size=13)
+        ),
+        font=dict(size=25),
+        margin=dict(l=40, r=40, t=50, b=0),
+        height=400
+    )
+    return fig_mini, fig
+
+
+def education_crime_figure(cube, selected_crime, selected_rate_column, weighting="mean"):
+    # Grouped bars of the 2023 crime rate and an education rate per district
+    selected_rate = education_translation[selected_rate_column]
+
+    # Combine the 2023 district crime rates with the district education means
+    # from the aggregate cube (both are fractions, this chart shows percentages)
+    with tracing.span("aggregate"):
+        combined_data = aggregates.education_crime_data(cube, selected_crime, selected_rate_column, weighting)
+
+    # Bar plot with ColorBrewer palette
+    fig = go.Figure()
+
+    # Add crime rate bar
+    fig.add_trace(go.Bar(
+        x=combined_data['DistrictName'],
+        y=combined_data['CrimeRate'],
+        name=selected_crime,
+        marker_color=px.colors.qualitative.Set2[0],  # Color from Set2
+        text=combined_data['CrimeRate'].apply(lambda x: f"{x:.2f}"),  # Text for outside position
+        textposition='outside',
+        textfont={'size': 16},
+        hovertemplate=(f'<b>%{{x}}</b><br>{selected_crime}:<br>%{{y:.2f}}%<extra></extra>')
+    ))
+
+    # Add education rate bar
+    fig.add_trace(go.Bar(
+        x=combined_data['DistrictName'],
+        y=combined_data[selected_rate_column],
+        name=selected_rate,
+        marker_color=px.colors.qualitative.Set2[1],  # Another color from Set2
+        text=combined_data[selected_rate_column].apply(lambda x: f"{x:.2f}"),  # Text for outside position
+        textposition='outside',
+        textfont={'size': 16},
+        hovertemplate=(f'<b>%{{x}}</b><br>{selected_rate}:<br>%{{y:.2f}}%<extra></extra>')
+    ))
+
+    # Update layout with translated labels
+    fig.update_layout(
+        barmode='group',  # Grouped bars
+        xaxis={'title': {'text': 'District Name', 'font': {'size': 18}}, 'tickfont': {'size': 16}},
+        yaxis={'title': {'text': 'Percentage', 'font': {'size': 18}}, 'tickfont': {'size': 16}},
+        height=550,
+        width=1300,
+        margin={'l': 50, 'r': 50, 't': 80, 'b': 100},
+        legend={'font': {'family': 'Arial', 'size': 13}}
+    )
+    return fig
+
+
+def socio_economic_figure(settlement_index, crime_type, show_all_points=False):
+    # Box plot of the 2023 settlement crime rates per socio-economic group.
+    # By default the boxes are drawn from precomputed statistics and only the
+    # outliers are sent as points; show_all_points sends every settlement
+
+    # Join the selected crime type's 2023 rows with the education data to
+    # include the socio-economic group (CrimeRate is already a fraction)
+    with tracing.span("aggregate"):
+        df_boxplot, stats, outlier_rows = aggregates.socio_economic_data(settlement_index, crime_type,
+                                                                         with_statistics=not show_all_points)
+
+    fig = go.Figure()
+
+    if show_all_points:
+        # Add traces for each socio-economic group (1-9)
+        for group in range(1, 10):
+            filtered = df_boxplot[df_boxplot['SocioeconomicGroup'] == group]
+            fig.add_trace(
+                go.Box(
+                    y=filtered['CrimeRate'],
+                    name=str(group),  # Group as category
+                    boxpoints="all",  # Show all points
+                    jitter=0.3,  # Add some jitter to points for better visibility
+                    pointpos=0,  # Align points directly on the group
+                    marker=dict(size=6, color=color_palette[group - 1]),  # Apply colorblind-friendly color
+                    line=dict(color=color_palette[group - 1]),  # Apply line color
+                    width=0.6  # Box width
+                )
+            )
+    else:
+        for group in range(1, 10):
+            color = color_palette[group - 1]
+            if group in stats.index:
+                group_stats = stats.loc[group]
+                box = go.Box(
+                    x=[str(group)],
+                    q1=[group_stats['q1']],
+                    median=[group_stats['median']],
+                    q3=[group_stats['q3']],
+                    lowerfence=[group_stats['lowerfence']],
+                    upperfence=[group_stats['upperfence']],
+                    boxpoints=False
+                )
+            else:
+                box = go.Box(y=[])
+            box.update(name=str(group), marker=dict(size=6, color=color), line=dict(color=color), width=0.6)
+            fig.add_trace(box)
+
+        # Only the settlements outside the whiskers are drawn as points
+        if not outlier_rows.empty:
+            groups = outlier_rows['SocioeconomicGroup'].to_numpy()
+            fig.add_trace(go.Scatter(
+                x=groups.astype(str),
+                y=outlier_rows['CrimeRate'].to_numpy(),
+                customdata=outlier_rows['Settlement'].astype(str),
+                mode='markers',
+                marker=dict(size=6, color=[color_palette[group - 1] for group in groups]),
+                showlegend=False,
+                hovertemplate='%{customdata}<br>%{y:.2%}<extra>%{x}</extra>'
+            ))
+
+    fig.update_layout(
+        # Y-axis customization
+        yaxis=dict(
+            title="Crime Rate",
+            title_font=dict(
+                size=17,
+            ),
+            tickfont=dict(
+                size=15,
+            ),
+            tickformat=".2%"  # Add the percentage sign to the ticks
+        ),
+        xaxis=dict(
+            tickmode='array',
+            tickvals=list(range(1, 10)),
+            ticktext=list(range(1, 10)),  # Explicitly set x-axis labels
+            title="Socio-Economic Group (1 to 9)",
+            title_font=dict(
+                size=17,
+            ),
+            tickfont=dict(
+                size=15,
+            )
+        ),
+        # Legend customization
+        legend=dict(
+            font=dict(
+                size=15
+            ),
+            orientation="v",
+            yanchor="top",
+            xanchor="right",
+            x=1.15,
+            y=0.7
+        ),
+        margin=dict(l=20, r=20, t=20, b=20),  # Tight margins
+        width=1400,
+        height=600,
+    )
+    return fig
+
+
+def integrated_figure(settlement_index, selected_rate, crime_types, years=(2023,), render_mode="auto",
+                      max_points=None):
+    # Settlement scatter of crime rate vs an education rate, colored by
+    # socio-economic group. Several years / crime types can be shown at once:
+    # above WEBGL_THRESHOLD points the plot is drawn with WebGL, and with
+    # max_points set the cloud is thinned on the server to at most that many
+    # points (outliers first)
+
+    # Join the selected crime types' rows with the education data
+    # (CrimeRate is already a fraction between 0 and 1)
+    with tracing.span("aggregate"):
+        df_scatter = aggregates.integrated_data(settlement_index, selected_rate, crime_types, years, max_points)
+
+    if render_mode == "auto":
+        render_mode = "webgl" if len(df_scatter) > WEBGL_THRESHOLD else "svg"
+
+    # Show which year / crime type a point belongs to when there are several
+    hover_data = {}
+    if len(years) > 1:
+        hover_data["Year"] = True
+    if len(crime_types) > 1:
+        hover_data["StatisticGroupEn"] = True
+
+    # Create the scatter plot with customized hovertemplate
+    fig4 = px.scatter(
+        df_scatter,
+        x=selected_rate,
+        y="CrimeRate",
+        color="SocioeconomicGroup",
+        hover_name="Settlement",
+        hover_data=hover_data,
+        render_mode=render_mode,
+        labels={selected_rate: education_translation[selected_rate], "CrimeRate": "Crime Rate (%)",
+                "StatisticGroupEn": "Crime Type"},
+    )
+
+    # All circles share one size (a single marker size instead of a per-point list)
+    fig4.update_traces(marker=dict(size=12))
+
+    # Update the layout to show percentages on both axes
+    fig4.update_layout(
+        xaxis=dict(
+            title=education_translation[selected_rate],
+            title_font=dict(size=18),
+            tickfont=dict(size=14),
+            tickformat=".2%"
+        ),
+        yaxis=dict(
+            title="Crime Rate",
+            title_font=dict(size=18),
+            tickfont=dict(size=14),
+            tickformat=".2%"
+        ),
+        legend=dict(
+            title="Socio-Economic Group",
+            title_font=dict(size=16, color="black"),
+            font=dict(size=12, color="black"),
+            tracegroupgap=9
+        ),
+        margin=dict(l=20, r=20, t=20, b=20),
+        width=1200,
+        height=500
+    )
+    return fig4
+
+
+def correlation_figure(table, method, confidence=0.95):
+    # Heatmap of r for every education metric (rows) and crime type
+    # (columns), from correlation.correlations(); a star marks the pairs
+    # whose bootstrap interval does not include 0
+    metrics = list(dict.fromkeys(table["Metric"]))
+    crime_types = list(dict.fromkeys(table["CrimeType"]))
+    shape = (len(metrics), len(crime_types))
+    r = table["r"].to_numpy().reshape(shape)
+    low = table["Low"].to_numpy().reshape(shape)
+    high = table["High"].to_numpy().reshape(shape)
+    settlements = table["Settlements"].to_numpy().reshape(shape)
+
+    significant = (low > 0) | (high < 0)
+    text = [[("" if value != value else f"{value:.2f}" + ("*" if star else ""))
+             for value, star in zip(row, stars)] for row, stars in zip(r, significant)]
+    interval = [[("no interval" if lo != lo else f"{confidence:.0%} CI [{lo:.2f}, {hi:.2f}]")
+                 for lo, hi in zip(row_low, row_high)] for row_low, row_high in zip(low, high)]
+
+    fig = go.Figure(go.Heatmap(
+        z=r.round(4),
+        x=crime_types,
+        y=[education_translation[metric] for metric in metrics],
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        text=text,
+        texttemplate="%{text}",
+        textfont=dict(size=14),
+        customdata=[list(zip(row_interval, row_count.tolist())) for row_interval, row_count in zip(interval, settlements)],
+        hovertemplate=("<b>%{y}</b> vs <b>%{x}</b><br>r = %{z:.3f}<br>%{customdata[0]}"
+                       "<br>%{customdata[1]} settlements<extra></extra>"),
+        colorbar=dict(title=f"{method.title()} r"),
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title="Crime Type", tickfont=dict(size=13), tickangle=30),
+        yaxis=dict(title="Education Metric", tickfont=dict(size=13), autorange="reversed"),
+        margin=dict(l=20, r=20, t=20, b=20),
+        height=500,
+    )
+    return fig
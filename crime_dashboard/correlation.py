@@ -0,0 +1,199 @@
+# Correlation engine: every education metric against every crime type at
+# settlement level, as a handful of matrix products instead of one test per
+# pair.
+#
+# Settlements are rows; X holds the education metrics and Y the crime rates
+# (NaN where a settlement has no value). Pearson's r of every (metric, crime
+# type) pair over the settlements that have both values comes from weighted
+# sums of x, y, x², y² and xy, each one (metrics x settlements) @
+# (settlements x crime types) product. Spearman is the same on ranks taken
+# over the settlements a pair shares, so the pairs are grouped by which
+# settlements they share and each group's columns are ranked once.
+# Population weights (NumResidents) scale the rows.
+#
+# A bootstrap resample is a vector of counts (how often each settlement was
+# drawn), i.e. just another weight vector, so all resamples are computed as
+# one stacked matrix product (in blocks, to bound memory) and the
+# confidence intervals are percentiles over the resample axis. For Spearman
+# every resample is re-ranked: a settlement drawn k times fills k positions.
+#
+#   python -m crime_dashboard.correlation --output correlations.csv   # every year and district
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from crime_dashboard.data import education_translation, statistic_group_translation
+
+METRICS = list(education_translation)
+CRIME_TYPES = list(statistic_group_translation.values())
+
+METHODS = ("pearson", "spearman")
+
+# Bootstrap resamples computed per stacked matrix product
+BLOCK_SIZE = 200
+
+
+def settlement_matrix(settlement_index, years, district=None):
+    # (X: settlements x metrics, Y: settlements x crime types, residents);
+    # one row per settlement and year
+    rows = settlement_index.select(years, CRIME_TYPES, districts=None if district is None else [district])
+
+    keys = [rows["Settlement"].astype(str), rows["Year"]]
+    crime_rates = rows["CrimeRate"].groupby([*keys, rows["StatisticGroupEn"].astype(str)]).mean().unstack()
+    crime_rates = crime_rates.reindex(columns=CRIME_TYPES)
+    settlements = rows[METRICS + ["NumResidents"]].groupby(keys).first().reindex(crime_rates.index)
+
+    return (settlements[METRICS].to_numpy(dtype="float64"), crime_rates.to_numpy(dtype="float64"),
+            settlements["NumResidents"].to_numpy(dtype="float64"))
+
+
+def rank_columns(values, counts):
+    # Column ranks among the rows drawn counts (n,) or stacked (b, n) times,
+    # a row drawn k times filling k positions; ties share the average rank.
+    # NaN where the value is missing or the row was not drawn
+    ranks = np.full(values.shape[-1:] + counts.shape, np.nan)
+    for column in range(values.shape[-1]):
+        order = np.argsort(values[:, column], kind="stable")
+        order = order[~np.isnan(values[order, column])]
+        if not len(order):
+            continue
+        sorted_values = values[order, column]
+        first = np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]])
+        # Rows drawn per distinct value, and how many were drawn below it
+        drawn = np.add.reduceat(counts[..., order], np.flatnonzero(first), axis=-1)
+        below = np.cumsum(drawn, axis=-1) - drawn
+        ranks[column][..., order] = (below + (drawn + 1) / 2)[..., np.cumsum(first) - 1]
+    return np.where((counts > 0)[..., None] & ~np.isnan(values), np.moveaxis(ranks, 0, -1), np.nan)
+
+
+def pearson(x, y, weights):
+    # Weighted Pearson r of every column of x against every column of y over
+    # the rows where both are present. weights is (n,) or stacked (b, n);
+    # the result is (m, c) or (b, m, c)
+    present_x, present_y = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(present_x, x, 0.0), np.where(present_y, y, 0.0)
+    present_y = present_y.astype("float64")
+
+    # w_k for the rows where x is present, per metric: (..., n, m)
+    w = weights[..., :, None] * present_x
+    wt = np.swapaxes(w, -1, -2)
+    wxt = np.swapaxes(w * x0, -1, -2)
+
+    total = wt @ present_y
+    sum_x = wxt @ present_y
+    sum_y = wt @ y0
+    sum_xx = np.swapaxes(w * x0 * x0, -1, -2) @ present_y
+    sum_yy = wt @ (y0 * y0)
+    sum_xy = wxt @ y0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x, mean_y = sum_x / total, sum_y / total
+        covariance = sum_xy / total - mean_x * mean_y
+        variance_x = sum_xx / total - mean_x * mean_x
+        variance_y = sum_yy / total - mean_y * mean_y
+        r = covariance / np.sqrt(variance_x * variance_y)
+    # Constant columns (or fewer than two rows) have no correlation
+    r[~(variance_x > 1e-15) | ~(variance_y > 1e-15)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def spearman(x, y, weights, counts=None):
+    # Weighted Spearman r of every column of x against every column of y,
+    # each pair ranked over the rows both are present in (and drawn in, for
+    # bootstrap counts (b, n)); the result is (m, c) or (b, m, c)
+    counts = np.ones(len(x)) if counts is None else counts
+    shared = (~np.isnan(x)).T[:, None, :] & (~np.isnan(y)).T[None, :, :]
+    patterns, pattern_of = np.unique(shared.reshape(-1, len(x)), axis=0, return_inverse=True)
+    pattern_of = pattern_of.ravel()
+
+    r = np.full(counts.shape[:-1] + shared.shape[:2], np.nan)
+    for pattern, rows in enumerate(patterns):
+        metrics, crime_types = np.divmod(np.flatnonzero(pattern_of == pattern), y.shape[1])
+        x_columns, y_columns = np.unique(metrics), np.unique(crime_types)
+        drawn = counts * rows
+        block = pearson(rank_columns(x[:, x_columns], drawn), rank_columns(y[:, y_columns], drawn),
+                        drawn * weights)
+        r[..., metrics, crime_types] = block[..., np.searchsorted(x_columns, metrics),
+                                             np.searchsorted(y_columns, crime_types)]
+    return r
+
+
+def correlate(x, y, weights=None, method="pearson", resamples=0, confidence=0.95, seed=0):
+    # r, the bootstrap interval (low, high; NaN without resamples) and the
+    # number of rows behind each pair, all (metrics x crime types)
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of: {', '.join(METHODS)}")
+    weights = np.ones(len(x)) if weights is None else np.asarray(weights, dtype="float64")
+    if method == "spearman":
+        statistic = lambda counts=None: spearman(x, y, weights, counts)
+    else:
+        statistic = lambda counts=None: pearson(x, y, weights if counts is None else counts * weights)
+
+    r = statistic()
+    pairs = (~np.isnan(x)).astype("float64").T @ (~np.isnan(y)).astype("float64")
+
+    low = high = np.full_like(r, np.nan)
+    if resamples and len(x):
+        rng = np.random.default_rng(seed)
+        # Counts of every settlement in every resample: (resamples, n)
+        counts = rng.multinomial(len(x), np.full(len(x), 1.0 / len(x)), size=resamples)
+        boot = np.concatenate([statistic(counts[start:start + BLOCK_SIZE])
+                               for start in range(0, resamples, BLOCK_SIZE)])
+        alpha = (1 - confidence) / 2
+        with warnings.catch_warnings():
+            # Pairs without a single defined resample stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            low, high = np.nanquantile(boot, [alpha, 1 - alpha], axis=0)
+    return r, low, high, pairs
+
+
+def correlations(settlement_index, years, district=None, method="pearson", weighted=False, resamples=0,
+                 confidence=0.95, seed=0):
+    # Long frame: Metric, CrimeType, r, Low, High, Settlements
+    x, y, residents = settlement_matrix(settlement_index, years, district)
+    r, low, high, pairs = correlate(x, y, residents if weighted else None, method, resamples, confidence, seed)
+    return pd.DataFrame({
+        "Metric": np.repeat(METRICS, len(CRIME_TYPES)),
+        "CrimeType": np.tile(CRIME_TYPES, len(METRICS)),
+        "r": r.ravel(),
+        "Low": low.ravel(),
+        "High": high.ravel(),
+        "Settlements": pairs.ravel().astype("int64"),
+    })
+
+
+if __name__ == "__main__":
+    from crime_dashboard import storage
+    from crime_dashboard.joins import SettlementIndex
+
+    parser = argparse.ArgumentParser(description="Correlate every education metric with every crime type")
+    parser.add_argument("--output", default="correlations.csv")
+    parser.add_argument("--method", choices=METHODS, default="pearson")
+    parser.add_argument("--weighted", action="store_true", help="weight settlements by their residents")
+    parser.add_argument("--resamples", type=int, default=1000, help="bootstrap resamples (0: no intervals)")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    education_df, crimes = storage.load_data()
+    settlement_index = SettlementIndex(crimes, education_df)
+    years = sorted(int(year) for year in crimes["Year"].unique())
+    districts = sorted(str(name) for name in crimes["DistrictNameEn"].dropna().unique())
+
+    start = time.perf_counter()
+    tables = []
+    # Every year, all years together, each on its own and per district
+    for scope_years, year_label in [([year], str(year)) for year in years] + [(years, "all")]:
+        for district in [None] + districts:
+            table = correlations(settlement_index, scope_years, district, args.method, args.weighted,
+                                 args.resamples, args.confidence, args.seed)
+            table.insert(0, "District", district or "all")
+            table.insert(0, "Year", year_label)
+            tables.append(table)
+    result = pd.concat(tables, ignore_index=True)
+    result.to_csv(args.output, index=False, float_format="%.6f")
+    print(f"{len(result)} correlations ({len(tables)} scopes x {len(METRICS)} metrics x {len(CRIME_TYPES)} "
+          f"crime types, {args.resamples} resamples) in {time.perf_counter() - start:.1f} s -> {args.output}")
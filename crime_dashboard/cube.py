@@ -0,0 +1,146 @@
+# Precomputed aggregate cube over the typed crimes frame.
+#
+# Every (crime type) gets a small district x year table of crime rates,
+# built once per data version. Pages answer widget changes
+# with label lookups on these tables instead of a groupby per rerun. District
+# rates come in both weightings of crime_dashboard/segments.py: the mean of
+# the settlements' rates and the population-weighted rate.
+# The year columns are independent, so when a data version only adds or
+# replaces years, AggregateCube.updated() aggregates just those years.
+import copy
+
+import pandas as pd
+
+from crime_dashboard.data import district_translation, education_translation, hebrew_crime_categories
+from crime_dashboard.segments import WEIGHTINGS, segment_rates
+
+
+def rate_tables(frame, key, weighting="mean"):
+    # crime type -> DataFrame (key x Year) of CrimeRate. The weighted rate
+    # divides by all residents of the key and year: the "all crimes" rows
+    # (StatisticGroupKod == -2) list every settlement once per year
+    population = frame.loc[frame["StatisticGroupKod"] == -2, [key, "Year", "NumResidents"]]
+    rates = segment_rates(frame, ["StatisticGroupEn", key, "Year"], weighting, population)
+    tables = {}
+    for crime_type, group in rates.groupby(level=0, observed=True):
+        table = group.droplevel(0).unstack("Year")
+        table.index = table.index.astype(str)
+        tables[str(crime_type)] = table
+    return tables
+
+
+def merge_tables(old, new, years, order):
+    # Replace the `years` columns of the old tables with the new tables;
+    # rows (and crime types) follow the order a full build would give
+    merged = {}
+    for crime_type in [name for name in order["crime_types"] if name in old or name in new]:
+        parts = []
+        if crime_type in old:
+            parts.append(old[crime_type].drop(columns=[year for year in years if year in old[crime_type].columns]))
+        if crime_type in new:
+            parts.append(new[crime_type])
+        table = pd.concat(parts, axis=1).dropna(how="all").dropna(axis=1, how="all")
+        if table.empty:
+            continue
+        table = table.reindex(index=[key for key in order["keys"] if key in table.index],
+                              columns=sorted(table.columns))
+        table.columns.name = "Year"
+        merged[crime_type] = table
+    return merged
+
+
+def to_long(table, key_name, crime_type, keys=None, years=None):
+    if keys is not None:
+        table = table.reindex(index=[key for key in keys if key in table.index])
+    if years is not None:
+        table = table.reindex(columns=[year for year in years if year in table.columns])
+    long = table.stack().dropna().rename("CrimeRate").reset_index()
+    long.columns = [key_name, "Year", "CrimeRate"]
+    long.insert(0, "StatisticGroup", crime_type)
+    return long
+
+
+def education_means(education_df):
+    # District means of the education rates (fractions). Rows follow the
+    # Hebrew district order; missing values count as 0 like before
+    rates = education_df[list(education_translation)].fillna(0)
+    education = rates.groupby(education_df["DistrictName"], observed=True).mean()
+    education.index = [district_translation.get(name, name) for name in education.index.astype(str)]
+    return education
+
+
+class DistrictRates:
+    # Queries on the district x year rate tables; subclasses provide
+    # district_table() and district_mean() (None for an unknown crime type)
+    def slice(self, crime_type, districts=None, years=None, weighting="mean"):
+        # Long frame: StatisticGroup, DistrictName, Year, CrimeRate
+        table = self.district_table(crime_type, weighting)
+        if table is None:
+            return pd.DataFrame(columns=["StatisticGroup", "DistrictName", "Year", "CrimeRate"])
+        return to_long(table, "DistrictName", crime_type, districts, years)
+
+    def average(self, crime_type, districts=None, weighting="mean"):
+        # Series: district -> mean rate over the years
+        average = self.district_mean(crime_type, weighting)
+        if average is None:
+            average = pd.Series(dtype="float32")
+        if districts is not None:
+            average = average.reindex([district for district in districts if district in average.index])
+        return average
+
+    def year_rates(self, crime_type, year, weighting="mean"):
+        # Series: district -> rate in one year
+        table = self.district_table(crime_type, weighting)
+        if table is None or year not in table.columns:
+            return pd.Series(dtype="float32")
+        return table[year].dropna()
+
+
+class AggregateCube(DistrictRates):
+    def __init__(self, crimes, education_df):
+        shown = self.set_labels(crimes)
+
+        # weighting -> crime type -> district x year table
+        self.district_rates = {weighting: rate_tables(shown, "DistrictNameEn", weighting) for weighting in WEIGHTINGS}
+        self.set_averages()
+
+        self.education_by_district = education_means(education_df)
+
+    def set_labels(self, crimes):
+        # Only the crime types that the pages show
+        shown = crimes[~crimes["StatisticGroup"].isin(hebrew_crime_categories)]
+
+        # Labels in order of first appearance (selectbox options, colors)
+        self.crime_types = shown["StatisticGroupEn"].unique().astype(str).tolist()
+        self.districts = shown["DistrictNameEn"].unique().astype(str).tolist()
+        self.years = sorted(int(year) for year in shown["Year"].unique())
+        return shown
+
+    def set_averages(self):
+        # Average over the years of each district's yearly rate
+        self.district_average = {weighting: {crime_type: table.mean(axis=1) for crime_type, table in tables.items()}
+                                 for weighting, tables in self.district_rates.items()}
+
+    def updated(self, crimes, years):
+        # Cube for a new crimes frame in which only `years` were added or
+        # changed: only those years' rows are aggregated again (the
+        # education data must be unchanged)
+        cube = copy.copy(self)
+        shown = cube.set_labels(crimes)
+        changed = shown[shown["Year"].isin(list(years))]
+        years = [int(year) for year in years]
+        crime_types = [str(name) for name in crimes["StatisticGroupEn"].cat.categories]
+
+        cube.district_rates = {
+            weighting: merge_tables(
+                self.district_rates[weighting], rate_tables(changed, "DistrictNameEn", weighting), years,
+                {"crime_types": crime_types, "keys": crimes["DistrictNameEn"].cat.categories.astype(str)})
+            for weighting in WEIGHTINGS}
+        cube.set_averages()
+        return cube
+
+    def district_table(self, crime_type, weighting="mean"):
+        return self.district_rates[weighting].get(crime_type)
+
+    def district_mean(self, crime_type, weighting="mean"):
+        return self.district_average[weighting].get(crime_type)
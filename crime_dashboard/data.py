@@ -0,0 +1,115 @@
+import pandas as pd
+
+# Default locations of the two datasets (relative to the repository root)
+EDUCATION_PATH = "DataEducation2023.xlsx"
+CRIMES_PATH = "final_crimes_updated.csv"
+
+# Create the translation dictionaries
+district_translation = {
+    "מרכז": "Center",
+    "תל אביב": "Tel Aviv",
+    "חיפה": "Haifa",
+    "דרום": "South",
+    "ירושלים": "Jerusalem",
+    "צפון": "North"
+}
+
+statistic_group_translation = {
+    "כל העבירות": "All Crimes",
+    "עבירות כלפי המוסר": "Moral Offenses",
+    "עבירות כלפי הרכוש": "Property Offenses",
+    "עבירות מרמה": "Fraud Offenses",
+    "עבירות סדר ציבורי": "Public Order Offenses",
+    "עבירות מנהליות": "Administrative Offenses",
+    "עבירות מין": "Sex Offenses",
+    "עבירות נגד גוף": "Offenses Against the Body",
+    "עבירות בטחון": "Security Offenses"
+}
+
+education_translation = {
+    "RateInTechEdu": "Technological education",
+    "DropoutRate": "Dropout of School",
+    "EligibleForBagrutRate": "Eligible For Bagrut",
+    "5UnitsMathematicsRate": "5 Units Mathematics",
+    "EligibleForExcellentBagrutRate": "Eligible For Excellent Bagrut"
+}
+
+# Hebrew crime categories that are not shown on any page
+hebrew_crime_categories = [
+    "עבירות נגד אדם", "עבירות רשוי", "עבירות תנועה",
+    "עבירות כלכליות", "סעיפי הגדרה", "שאר עבירות"
+]
+
+
+def translated_category(series, translation):
+    # Build an English categorical next to the Hebrew one; labels without a
+    # translation keep their Hebrew name (same as Series.replace did before)
+    # (mapping a categorical only touches its categories, not every row)
+    hebrew = series.astype("category")
+    return hebrew.map(lambda name: translation.get(name, name)).astype("category")
+
+
+# Categorical crime columns: Hebrew column -> (English column, translation)
+crime_category_columns = {
+    "Settlement": None,
+    "StatisticGroup": ("StatisticGroupEn", statistic_group_translation),
+    "DistrictName": ("DistrictNameEn", district_translation),
+}
+
+
+def crime_categories(frames):
+    # Categorical dtypes for several prepared crimes frames put together: the
+    # same categories prepare_crimes would give the concatenated raw data
+    dtypes = {}
+    for column, english in crime_category_columns.items():
+        names = set()
+        for frame in frames:
+            names.update(frame[column].cat.categories)
+        hebrew = pd.Series(sorted(names))
+        dtypes[column] = hebrew.astype("category").dtype
+        if english:
+            english_column, translation = english
+            dtypes[english_column] = translated_category(hebrew, translation).dtype
+    return dtypes
+
+
+def prepare_crimes(crimes):
+    # Parse the "0.14%" strings once into a float32 fraction (0.0014)
+    rates = crimes["CrimeRate"]
+    if not pd.api.types.is_numeric_dtype(rates):
+        rates = pd.to_numeric(rates.astype(str).str.rstrip('%'), errors="coerce") / 100
+
+    typed = pd.DataFrame({
+        "Settlement": crimes["Settlement"].astype("category"),
+        "StatisticGroup": crimes["StatisticGroup"].astype("category"),
+        "StatisticGroupEn": translated_category(crimes["StatisticGroup"], statistic_group_translation),
+        "StatisticGroupKod": crimes["StatisticGroupKod"].astype("int16"),
+        "Year": crimes["Year"].astype("int16"),
+        "Count": crimes["Count"].astype("int32"),
+        "NumResidents": crimes["NumResidents"].astype("int32"),
+        "CrimeRate": rates.astype("float32"),
+        "DistrictName": crimes["DistrictName"].astype("category"),
+        "DistrictNameEn": translated_category(crimes["DistrictName"], district_translation),
+    })
+    return typed
+
+
+def prepare_education(education_df):
+    typed = pd.DataFrame({
+        "Settlement": education_df["Settlement"].astype("category"),
+        "SocioeconomicGroup": education_df["SocioeconomicGroup"].astype("int8"),
+        "DistrictName": education_df["DistrictName"].astype("category"),
+        "DistrictNameEn": translated_category(education_df["DistrictName"], district_translation),
+        "NumResidents": education_df["NumResidents"].astype("int32"),
+        "NumStudents": education_df["NumStudents"].astype("int32"),
+    })
+    # Education rates stay fractions (0.35 = 35%), stored as float32
+    for column in education_translation:
+        typed[column] = education_df[column].astype("float32")
+    return typed
+
+
+def load_data(education_path=EDUCATION_PATH, crimes_path=CRIMES_PATH):
+    education_df = pd.read_excel(education_path)
+    crimes = pd.read_csv(crimes_path)
+    return prepare_education(education_df), prepare_crimes(crimes)
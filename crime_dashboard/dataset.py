@@ -0,0 +1,79 @@
+# Read-only dataset shared by every session.
+#
+# The frames are rebuilt on read-only copies of their column arrays, so an
+# in-place write such as df.loc[...] = ... raises instead of changing the data
+# that other sessions see. Adding, replacing or dropping a column, or giving
+# one new values (df[c] *= 100 rebinds the column to a new array), is caught
+# by Dataset.verify(), which the app calls at the end of every rerun.
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+class DatasetMutatedError(RuntimeError):
+    pass
+
+
+def read_only_frame(frame):
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[name] = pd.Categorical.from_codes(codes, dtype=column.dtype, validate=False)
+        else:
+            values = column.to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[name] = values
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+def column_values(column):
+    # The array behind a column (a categorical's codes); the typed frames
+    # only hold numpy and categorical columns
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.array.codes
+    return column.to_numpy()
+
+
+def signature(frame):
+    # Per column: name, dtype, categories and the address of its values, so
+    # replacing a column's values (df[c] *= 100, df[c] = other column) is
+    # caught even when the dtype stays the same
+    columns = []
+    for name in frame.columns:
+        column = frame[name]
+        categories = tuple(column.cat.categories) if isinstance(column.dtype, pd.CategoricalDtype) else None
+        address = column_values(column).__array_interface__["data"][0]
+        columns.append((name, str(column.dtype), categories, address))
+    return tuple(columns), len(frame)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    education: pd.DataFrame
+    crimes: pd.DataFrame
+    version: str
+    signatures: dict = field(default_factory=dict, compare=False)
+    # storage.partition_versions() of the loaded data (which years changed)
+    partitions: dict = field(default_factory=dict, compare=False)
+    # The column arrays as loaded, kept alive so no new array can take an
+    # address recorded in the signatures
+    arrays: tuple = field(default=(), compare=False, repr=False)
+
+    @classmethod
+    def from_frames(cls, education_df, crimes, version, partitions=None, copy=True):
+        # copy=False: the frames are already built on read-only arrays (the
+        # memory maps of crime_dashboard/shared.py) and are used as they are
+        if copy:
+            education_df, crimes = read_only_frame(education_df), read_only_frame(crimes)
+        arrays = tuple(column_values(frame[name]) for frame in (education_df, crimes) for name in frame.columns)
+        return cls(education_df, crimes, version,
+                   {"education": signature(education_df), "crimes": signature(crimes)}, partitions or {}, arrays)
+
+    def verify(self):
+        # Raise if a page changed the columns (or their values) of a shared frame
+        for name in ("education", "crimes"):
+            if signature(getattr(self, name)) != self.signatures[name]:
+                raise DatasetMutatedError(f"The shared {name} frame was modified (data version {self.version})")
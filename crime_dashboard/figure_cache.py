@@ -0,0 +1,111 @@
+# Bounded LRU cache of built figures shared by all sessions.
+#
+# Keys are (page, data version, selections); a repeated view skips both the
+# pandas work and the Plotly figure construction. Cached figures are never
+# modified afterwards (st.plotly_chart serializes a copy).
+#
+# Concurrent misses of one key are coalesced (single flight): the first
+# caller builds, the others wait for it and share its result, so a cold cache
+# (a new data version, a fresh server) costs one build per view however many
+# sessions open it at once. If the build fails, its waiters get the same
+# exception and nothing is cached (the next lookup tries again); a waiter
+# that gives up after `timeout` seconds builds its own copy.
+import os
+import threading
+from collections import OrderedDict
+
+COALESCE_TIMEOUT = float(os.environ.get("CRIME_DASHBOARD_COALESCE_TIMEOUT", "30"))
+
+
+def figure_key(page, version, **selections):
+    # Hashable key; lists (e.g. multiselect values) become tuples
+    def freeze(value):
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(value))
+        if isinstance(value, list):
+            return tuple(value)
+        return value
+
+    return page, version, tuple(sorted((name, freeze(value)) for name, value in selections.items()))
+
+
+class _Flight:
+    # A build in progress; waiters block on `done`
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.finished = False
+
+
+class FigureCache:
+    def __init__(self, max_entries=256, timeout=COALESCE_TIMEOUT):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        # Lookups that waited for another caller's build, and those that gave up
+        self.coalesced = 0
+        self.timeouts = 0
+        self._entries = OrderedDict()
+        # key -> _Flight of the build in progress
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if flight.done.wait(self.timeout) and flight.finished:
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            if not flight.done.is_set():
+                with self._lock:
+                    self.timeouts += 1
+            # Timed out, or the build was interrupted (e.g. its session
+            # stopped): build without waiting any longer
+            return build()
+
+        try:
+            value = build()
+        except Exception as error:
+            flight.error, flight.finished = error, True
+            raise
+        else:
+            flight.value, flight.finished = value, True
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            # A coalesced lookup did not build either (unless it timed out)
+            lookups = self.hits + self.misses + self.coalesced
+            served = self.hits + self.coalesced - self.timeouts
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "coalesced": self.coalesced, "timeouts": self.timeouts,
+                    "in_flight": len(self._flights), "hit_ratio": served / lookups if lookups else 0.0}
@@ -0,0 +1,98 @@
+# Hot-swapped data versions: a new crime or education file is picked up
+# without restarting the server and without a slow first rerun.
+#
+# A Reloader holds the snapshot every request reads, (data version, what was
+# built for it). A background thread probes the data version every
+# CRIME_DASHBOARD_RELOAD_INTERVAL seconds; when it changes, the thread builds
+# the new version's frames and aggregates while requests keep reading the
+# current snapshot, then replaces the snapshot with one assignment. A rerun
+# takes the snapshot once when it starts, so reruns already running finish on
+# the old version and the next ones see the new one. Both versions stay
+# built (double-buffered): the app's loaders keep two entries per cache.
+#
+#   CRIME_DASHBOARD_RELOAD_INTERVAL=0 streamlit run NewDashboard.py   # check on every rerun instead
+#
+# If building a new version fails, the current one keeps being served and the
+# build is retried on the next check.
+import os
+import threading
+import time
+
+from crime_dashboard import tracing
+
+RELOAD_INTERVAL = float(os.environ.get("CRIME_DASHBOARD_RELOAD_INTERVAL", "10"))
+THREAD_NAME = "crime-dashboard-reloader"
+
+
+class Reloader:
+    def __init__(self, probe, build, interval=RELOAD_INTERVAL, build_first=True):
+        # probe() -> the current data version; build(version) -> the value
+        # requests read for it. build_first=False serves the first version
+        # without building it (its value is None): callers that load what
+        # they need on demand then do not wait for everything up front
+        self.probe = probe
+        self.build = build
+        self.interval = interval
+        self.build_first = build_first
+        self.snapshot = None
+        self.swaps = 0
+        self.last_error = None
+        self.last_swap = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current(self):
+        # (version, value) of the current snapshot
+        if self.interval <= 0:
+            # No watcher: probe on every call and build on the request path
+            self.check()
+            return self.snapshot
+        snapshot = self.snapshot
+        if snapshot is None:
+            with self._lock:
+                if self.snapshot is None:
+                    # Nothing to serve yet: the first version is built here
+                    # (with build_first)
+                    version = self.probe()
+                    self.snapshot = version, self.build(version) if self.build_first else None
+                    self.start()
+            snapshot = self.snapshot
+        return snapshot
+
+    def check(self):
+        # Build and swap in the probed version if it is not the current one;
+        # True when it was swapped. One build at a time
+        with self._lock:
+            version = self.probe()
+            if self.snapshot is not None and self.snapshot[0] == version:
+                return False
+            if self.snapshot is None and not self.build_first:
+                self.snapshot = version, None
+                return True
+            with tracing.span("reload"):
+                value = self.build(version)
+            self.snapshot = version, value
+            self.swaps += 1
+            self.last_swap = time.time()
+            return True
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self.watch, name=THREAD_NAME, daemon=True)
+            self._thread.start()
+
+    def watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as error:
+                # Keep serving the current snapshot; try again next interval
+                self.last_error = error
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
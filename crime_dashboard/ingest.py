@@ -0,0 +1,195 @@
+# Ingestion pipeline that builds final_crimes_updated.csv from the raw
+# yearly police files (crimes2020.csv ... crimes2024.csv) and the education
+# file, replacing the steps in Preprocessing.ipynb.
+#
+# Each raw file is streamed in chunks and reduced to incident counts per
+# (Settlement, StatisticGroup, StatisticGroupKod, Year). These per-file
+# counts are kept in the work directory together with the raw file's
+# fingerprint, so when a new year arrives only that file is read.
+#
+#   python -m crime_dashboard.ingest --raw-dir raw/ --education education.xlsx
+import argparse
+import glob
+import json
+import os
+
+import pandas as pd
+
+from crime_dashboard import data, storage
+
+WORK_DIR = os.path.join(storage.CACHE_DIR, "ingest")
+CHUNK_SIZE = 200_000
+
+# Raw police columns -> dataset columns
+crime_column_mapping = {
+    "Year": "Year",
+    "Yeshuv": "Settlement",
+    "StatisticGroupKod": "StatisticGroupKod",
+    "StatisticGroup": "StatisticGroup"
+}
+
+# Raw education columns -> dataset columns (the raw Ministry of Education file)
+education_column_mapping = {
+    "שם רשות": "Settlement",
+    "אשכול סוציו-אקונומי": "SocioeconomicGroup",
+    "שם מחוז גיאוגרפי": "DistrictName",
+    "מספר תושבים ברשות לשנת תשפג": "NumResidents",
+    "מספר תלמידים גרים ברשות": "NumStudents",
+    "שיעור התלמידים בחינוך טכנולוגי": "RateInTechEdu",
+    "אחוז נשירה מלומדים": "DropoutRate",
+    "אחוז זכאים לבגרות  מהלומדים": "EligibleForBagrutRate",
+    "אחוז זכאות לבגרות  מצטיינת מהלומדים": "EligibleForExcellentBagrutRate",
+    "אחוז זכאות 5 יחידות מתמטיקה": "5UnitsMathematicsRate"
+}
+
+# Education settlement names that are spelled differently in the police files
+settlement_name_fixes = {
+    "תל אביב-יפו": "תל אביב יפו",
+    "פתח תקוה": "פתח תקווה"
+}
+
+COUNT_KEYS = ["Settlement", "StatisticGroup", "StatisticGroupKod", "Year"]
+OUTPUT_COLUMNS = ["Settlement", "StatisticGroup", "StatisticGroupKod", "Year", "Count", "NumResidents",
+                  "CrimeRate", "DistrictName"]
+
+# Synthesized "all crimes" rows
+TOTAL_GROUP = "כל העבירות"
+TOTAL_KOD = -2
+
+
+def read_education(path):
+    education_df = pd.read_excel(path)
+    # The raw file has Hebrew headers, DataEducation2023.xlsx is already renamed
+    if "Settlement" not in education_df.columns:
+        education_df = education_df[list(education_column_mapping)].rename(columns=education_column_mapping)
+    education_df["Settlement"] = education_df["Settlement"].replace(settlement_name_fixes)
+    return education_df
+
+
+def count_raw_file(path, chunksize=CHUNK_SIZE):
+    # Stream one raw file and return incident counts per COUNT_KEYS
+    counts = None
+    chunks = pd.read_csv(path, usecols=list(crime_column_mapping), chunksize=chunksize)
+    for chunk in chunks:
+        chunk = chunk.rename(columns=crime_column_mapping).dropna()
+        partial = chunk.groupby(COUNT_KEYS).size()
+        counts = partial if counts is None else counts.add(partial, fill_value=0)
+
+    if counts is None:
+        return pd.DataFrame(columns=COUNT_KEYS + ["Count"])
+    counts = counts.astype("int64").rename("Count").reset_index()
+    counts["StatisticGroupKod"] = counts["StatisticGroupKod"].astype("int64")
+    counts["Year"] = counts["Year"].astype("int64")
+    return counts
+
+
+def read_state(work_dir):
+    try:
+        with open(os.path.join(work_dir, "state.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state, work_dir):
+    path = os.path.join(work_dir, "state.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def partial_path(raw_path, work_dir):
+    name = os.path.splitext(os.path.basename(raw_path))[0]
+    return os.path.join(work_dir, name + ".counts.feather")
+
+
+def update_counts(raw_paths, work_dir=WORK_DIR, chunksize=CHUNK_SIZE, log=print):
+    # Recount only the raw files that are new or changed since the last run
+    os.makedirs(work_dir, exist_ok=True)
+    state = read_state(work_dir)
+    all_counts = []
+
+    for raw_path in sorted(raw_paths):
+        previous = state.get(raw_path)
+        current = storage.fingerprint(raw_path, previous)
+        counts_path = partial_path(raw_path, work_dir)
+
+        if previous and previous["sha256"] == current["sha256"] and os.path.exists(counts_path):
+            counts = pd.read_feather(counts_path)
+            log(f"{raw_path}: unchanged, reusing counts")
+        else:
+            counts = count_raw_file(raw_path, chunksize)
+            storage.write_frame(counts, counts_path)
+            log(f"{raw_path}: counted {int(counts['Count'].sum())} incidents")
+
+        state[raw_path] = current
+        all_counts.append(counts)
+
+    # Keep the counts of files left out of this run (e.g. a single new year)
+    # for the next full run; forget only files that no longer exist
+    for path in [path for path in state if not os.path.exists(path)]:
+        del state[path]
+        if os.path.exists(partial_path(path, work_dir)):
+            os.remove(partial_path(path, work_dir))
+    write_state(state, work_dir)
+    return pd.concat(all_counts, ignore_index=True)
+
+
+def format_rate(count, residents):
+    # Same "0.14%" strings as the published CSV
+    return (count / residents * 100).map(lambda rate: f"{rate:.2f}%")
+
+
+def build_crimes(counts, education_df):
+    residents = education_df[["Settlement", "NumResidents"]]
+
+    # Add NumResidents, drop settlements without it and the -1 group
+    crimes = counts.merge(residents, on="Settlement", how="left")
+    crimes = crimes.dropna(subset=["NumResidents"])
+    crimes = crimes[crimes["StatisticGroupKod"] != -1]
+
+    # "All crimes" totals per settlement and year (StatisticGroupKod == -2)
+    totals = crimes.groupby(["Year", "Settlement"], as_index=False)["Count"].sum()
+    totals = totals.merge(residents, on="Settlement", how="left")
+    totals["StatisticGroup"] = TOTAL_GROUP
+    totals["StatisticGroupKod"] = TOTAL_KOD
+
+    crimes = pd.concat([crimes, totals[COUNT_KEYS + ["Count", "NumResidents"]]], ignore_index=True)
+    crimes["NumResidents"] = crimes["NumResidents"].astype("int64")
+    crimes["CrimeRate"] = format_rate(crimes["Count"], crimes["NumResidents"])
+
+    crimes = crimes.sort_values(["Year", "Settlement"], kind="stable").reset_index(drop=True)
+    crimes = crimes.merge(education_df[["Settlement", "DistrictName"]], on="Settlement", how="left")
+    return crimes[OUTPUT_COLUMNS]
+
+
+def run(raw_paths, education_path, output_path=data.CRIMES_PATH, work_dir=WORK_DIR, chunksize=CHUNK_SIZE,
+        log=print):
+    education_df = read_education(education_path)
+    counts = update_counts(raw_paths, work_dir, chunksize, log)
+    crimes = build_crimes(counts, education_df)
+
+    tmp_path = output_path + ".tmp"
+    crimes.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, output_path)
+    log(f"Wrote {len(crimes)} rows to {output_path}")
+    return crimes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build final_crimes_updated.csv from the raw police files")
+    parser.add_argument("raw_files", nargs="*", help="raw yearly police CSV files")
+    parser.add_argument("--raw-dir", help="directory with crimesYYYY.csv files")
+    parser.add_argument("--education", default=data.EDUCATION_PATH, help="education Excel file")
+    parser.add_argument("--output", default=data.CRIMES_PATH)
+    parser.add_argument("--work-dir", default=WORK_DIR)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    raw_paths = list(args.raw_files)
+    if args.raw_dir:
+        raw_paths += sorted(glob.glob(os.path.join(args.raw_dir, "crimes*.csv")))
+    if not raw_paths:
+        parser.error("no raw crime files given (pass files or --raw-dir)")
+
+    run(raw_paths, args.education, args.output, args.work_dir, args.chunksize)
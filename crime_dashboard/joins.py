@@ -0,0 +1,154 @@
+# Settlement-keyed join between the crimes and education frames.
+#
+# Both datasets get integer codes into one shared settlement index, so a
+# join is two array lookups. Rows are filtered first and only those rows
+# are joined: every crime row is indexed in bitmaps (crime_dashboard/
+# bitmaps.py) by year, crime type, district, its settlement's
+# socio-economic group and which education rates it has, so a filter over
+# any of them is a few bitset operations. The join of the last few
+# (years, crime types) selections is cached; a filtered selection keeps the
+# cached rows whose bit is set.
+# `python -m crime_dashboard.joins` reports the settlements that do not
+# match between the two files.
+import argparse
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from crime_dashboard.bitmaps import BitmapIndex, flag, frame_columns
+from crime_dashboard.data import education_translation
+
+# Education columns carried into the joined frame
+EDUCATION_COLUMNS = ["SocioeconomicGroup"] + list(education_translation)
+
+# (years, crime types) selections whose join is kept
+JOINS_CACHED = 16
+
+
+def normalize_name(name):
+    # Spelling variants seen between the police and education files,
+    # e.g. "תל אביב-יפו" / "תל אביב יפו" and "פתח תקוה" / "פתח תקווה"
+    name = re.sub(r"[-־–'\"׳״]", " ", str(name))
+    name = re.sub(r"וו", "ו", name)
+    name = re.sub(r"יי", "י", name)
+    return " ".join(name.split())
+
+
+class SettlementIndex:
+    def __init__(self, crimes, education_df):
+        self.crimes = crimes
+        self.education_df = education_df
+
+        crime_names = crimes["Settlement"].astype(str)
+        education_names = education_df["Settlement"].astype(str)
+
+        # One shared code per settlement name for both datasets
+        self.settlements = pd.Index(sorted(set(crime_names.unique()) | set(education_names.unique())))
+        self.crime_codes = self.settlements.get_indexer(crime_names).astype("int32")
+        self.education_codes = self.settlements.get_indexer(education_names).astype("int32")
+
+        # code -> row of education_df (-1 when the settlement has no education data)
+        self.education_rows = np.full(len(self.settlements), -1, dtype="int32")
+        self.education_rows[self.education_codes] = np.arange(len(education_df), dtype="int32")
+
+        # Crime row -> education row (-1: no education data)
+        self.crime_education_rows = self.education_rows[self.crime_codes]
+        matched = self.crime_education_rows >= 0
+
+        columns = frame_columns(crimes, ["Year", "StatisticGroupEn", "DistrictNameEn"])
+        groups = education_df["SocioeconomicGroup"].to_numpy()[self.crime_education_rows]
+        group_codes, group_values = pd.factorize(pd.Series(groups).where(matched), sort=True)
+        columns["SocioeconomicGroup"] = (group_codes, [int(value) for value in group_values])
+        # Rows whose settlement has education data, and a value for each rate
+        columns["matched"] = flag(matched)
+        for rate in education_translation:
+            columns[rate] = flag(matched & education_df[rate].notna().to_numpy()[self.crime_education_rows])
+        self.bitmaps = BitmapIndex(columns, len(crimes))
+
+        self._joined = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rows(self, years, crime_types, districts=None, groups=None, rates=()):
+        # Positions of the matched crime rows of the given years and crime
+        # types (optionally districts, socio-economic groups - a list or a
+        # predicate - and education rates that must be present), ordered by
+        # year and crime type as listed, then by row
+        bitmaps = self.bitmaps
+        selected = self.filter(districts, groups, rates)
+        parts = [bitmaps.positions(selected & bitmaps.bitmap("Year", [year]) & bitmaps.bitmap("StatisticGroupEn",
+                                                                                                [crime_type]))
+                 for year in years for crime_type in crime_types]
+        return np.concatenate(parts) if parts else np.array([], dtype="int64")
+
+    def filter(self, districts=None, groups=None, rates=()):
+        # Bitmap of the matched rows that pass the filters
+        return self.bitmaps.select(matched=[True], DistrictNameEn=districts, SocioeconomicGroup=groups,
+                                   **{rate: [True] for rate in rates})
+
+    def gather(self, rows):
+        # The crime rows at `rows` with their settlement's education columns
+        joined = self.crimes.iloc[rows].reset_index(drop=True)
+        education = self.education_df[EDUCATION_COLUMNS].iloc[self.crime_education_rows[rows]].reset_index(drop=True)
+        return pd.concat([joined, education], axis=1)
+
+    def join(self, years, crime_types):
+        # (positions, joined frame) of rows(years, crime_types), cached for
+        # the last JOINS_CACHED selections
+        key = (tuple(int(year) for year in years), tuple(crime_types))
+        with self._lock:
+            if key in self._joined:
+                self._joined.move_to_end(key)
+                return self._joined[key]
+
+        rows = self.rows(years, crime_types)
+        joined = rows, self.gather(rows)
+        with self._lock:
+            self._joined[key] = joined
+            while len(self._joined) > JOINS_CACHED:
+                self._joined.popitem(last=False)
+        return joined
+
+    def select(self, years, crime_types, districts=None, groups=None, rates=()):
+        # Joined frame of rows(...); settlements without education data are dropped
+        rows, joined = self.join(list(years), list(crime_types))
+        if districts is None and groups is None and not rates:
+            # A shallow copy: the cached frame stays as it is
+            return joined.copy(deep=False)
+        selected = self.filter(districts, groups, rates)
+        keep = (selected[rows >> 6] >> (rows & 63).astype("uint64")) & 1
+        return joined[keep.astype(bool)].reset_index(drop=True)
+
+    def unmatched(self):
+        # Settlements found in only one of the datasets, with the likely
+        # counterpart in the other one when the names differ only in spelling
+        crime_codes = set(self.crime_codes.tolist())
+        education_codes = set(self.education_codes.tolist())
+        crimes_only = sorted(self.settlements[list(crime_codes - education_codes)])
+        education_only = sorted(self.settlements[list(education_codes - crime_codes)])
+
+        by_normalized = {normalize_name(name): name for name in education_only}
+        suggestions = {name: by_normalized[normalize_name(name)]
+                       for name in crimes_only if normalize_name(name) in by_normalized}
+        return {"crimes_only": crimes_only, "education_only": education_only, "suggestions": suggestions}
+
+
+if __name__ == "__main__":
+    from crime_dashboard import storage
+
+    parser = argparse.ArgumentParser(description="Report settlements that do not match between the datasets")
+    parser.add_argument("--cache-dir", default=storage.CACHE_DIR)
+    args = parser.parse_args()
+
+    education_df, crimes = storage.load_data(args.cache_dir)
+    report = SettlementIndex(crimes, education_df).unmatched()
+
+    print(f"Settlements only in the crime data ({len(report['crimes_only'])}):")
+    for name in report["crimes_only"]:
+        hint = report["suggestions"].get(name)
+        print(f"  {name}" + (f"  (education data has '{hint}')" if hint else ""))
+    print(f"Settlements only in the education data ({len(report['education_only'])}):")
+    for name in report["education_only"]:
+        print(f"  {name}")
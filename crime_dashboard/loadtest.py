@@ -0,0 +1,319 @@
+# Load generator: N concurrent dashboard sessions against one server.
+#
+# Starts `streamlit run NewDashboard.py` (or uses --url) and connects N
+# sessions to it over the same websocket protocol the browser uses. A
+# session walks the pages in order through the sidebar navigation (each
+# session starting on a different page), and on each page makes a few random
+# changes to the page's widgets (crime type, districts, education rate,
+# years, ...), with a random think time between actions. A widget inside a
+# page fragment reruns only that fragment, like in the browser. Each action
+# is timed from sending it until the server reports the run finished.
+#
+# The report gives the p50/p95/p99 rerun latency per page, throughput
+# (reruns per second) and the server's resident memory sampled over time.
+#
+#   python -m crime_dashboard.loadtest --sessions 8 --duration 60 --output loadtest.json
+#   python -m crime_dashboard.loadtest --url ws://host:8501 --pid 1234   # an already running server
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from crime_dashboard.tracing import QUANTILES, summarize
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NewDashboard.py")
+STREAM_PATH = "/_stcore/stream"
+NAVIGATION_LABEL = "Go to"
+FIRST_PAGE = "Overview"
+
+# Widget kinds a session changes (element types of the protocol)
+WIDGETS = ("selectbox", "multiselect", "radio", "checkbox", "select_slider")
+
+# ForwardMsg.script_finished values that mean the run completed
+FINISHED_SUCCESSFULLY = 0
+FINISHED_FRAGMENT_RUN_SUCCESSFULLY = 3
+
+
+def rss_mb(pid):
+    # Resident set size of a process (Linux); None where /proc is missing
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, timeout=60):
+    # A headless server of the app; returns the process once it is healthy
+    command = [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+               "--server.port", str(port), "--server.fileWatcherType", "none",
+               "--browser.gatherUsageStats", "false"]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"streamlit did not start within {timeout} s")
+
+
+class Session:
+    def __init__(self, number, pages, args, results, stop):
+        self.number = number
+        self.pages = pages[number % len(pages):] + pages[:number % len(pages)]
+        self.args = args
+        self.results = results
+        self.stop = stop
+        self.rng = random.Random(args.seed + number)
+        # Widgets drawn by the last run: id -> (kind, proto, fragment id)
+        self.widgets = {}
+        # Widget values sent with every rerun, as the browser does: id -> WidgetState
+        self.states = {}
+
+    async def rerun(self, websocket, page, action, fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+
+        start = time.perf_counter()
+        await websocket.send(message.SerializeToString())
+        drawn, error = {}, None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await websocket.recv())
+            kind = reply.WhichOneof("type")
+            if kind == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element = reply.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in WIDGETS:
+                    widget = getattr(element, element_type)
+                    drawn[widget.id] = (element_type, widget, reply.delta.fragment_id)
+                elif element_type == "exception":
+                    error = f"{element.exception.type}: {element.exception.message}"
+            elif kind == "script_finished":
+                if reply.script_finished not in (FINISHED_SUCCESSFULLY, FINISHED_FRAGMENT_RUN_SUCCESSFULLY):
+                    error = error or f"script finished with status {reply.script_finished}"
+                break
+        seconds = time.perf_counter() - start
+
+        if fragment_id:
+            self.widgets.update(drawn)
+        else:
+            # Widgets that were not drawn are gone, with their values
+            self.widgets = drawn
+            self.states = {key: state for key, state in self.states.items() if key in drawn}
+        self.results.append({"session": self.number, "page": page, "action": action, "seconds": seconds,
+                             "time": time.time(), "error": error})
+
+    def set_state(self, widget_id, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=widget_id)
+        if "strings" in value:
+            state.string_array_value.data[:] = value["strings"]
+        elif "string" in value:
+            state.string_value = value["string"]
+        else:
+            state.bool_value = value["flag"]
+        self.states[widget_id] = state
+
+    def change(self, kind, widget):
+        # Set a random new value for a widget; options are sent as their labels
+        options = list(getattr(widget, "options", ()))
+        if kind == "checkbox":
+            current = self.states[widget.id].bool_value if widget.id in self.states else widget.default
+            self.set_state(widget.id, flag=not current)
+        elif kind == "multiselect":
+            self.set_state(widget.id, strings=self.rng.sample(options, self.rng.randint(1, min(3, len(options)))))
+        elif kind == "select_slider":
+            self.set_state(widget.id, strings=[self.rng.choice(options)])
+        else:
+            self.set_state(widget.id, string=self.rng.choice(options))
+
+    async def think(self):
+        if self.args.think:
+            try:
+                await asyncio.wait_for(self.stop.wait(), self.rng.expovariate(1 / self.args.think))
+            except asyncio.TimeoutError:
+                pass
+
+    async def visit(self, websocket, page):
+        navigation = next((widget for kind, widget, _ in self.widgets.values() if widget.label == NAVIGATION_LABEL),
+                          None)
+        if navigation is None:
+            raise RuntimeError("the app did not draw its navigation")
+        self.set_state(navigation.id, string=page)
+        await self.rerun(websocket, page, "navigate")
+
+        for _ in range(self.args.changes):
+            choices = [(kind, widget, fragment_id) for kind, widget, fragment_id in self.widgets.values()
+                       if widget.label != NAVIGATION_LABEL and (kind == "checkbox" or len(widget.options) > 1)]
+            if not choices or self.stop.is_set():
+                return
+            await self.think()
+            kind, widget, fragment_id = self.rng.choice(choices)
+            self.change(kind, widget)
+            await self.rerun(websocket, page, f"{kind}:{widget.label}", fragment_id)
+
+    async def run(self, url):
+        import websockets
+
+        while not self.stop.is_set():
+            try:
+                async with websockets.connect(url + STREAM_PATH, subprotocols=["streamlit"], max_size=None,
+                                              open_timeout=self.args.timeout) as websocket:
+                    self.widgets, self.states = {}, {}
+                    await asyncio.wait_for(self.rerun(websocket, FIRST_PAGE, "open"), self.args.timeout)
+                    while not self.stop.is_set():
+                        for page in self.pages:
+                            if self.stop.is_set():
+                                return
+                            await self.think()
+                            await asyncio.wait_for(self.visit(websocket, page),
+                                                   self.args.timeout * (1 + self.args.changes))
+            except Exception as exception:
+                # Dropped connection, a run over the timeout, ...: count it
+                # and start a new session
+                self.results.append({"session": self.number, "page": None, "action": "connect", "seconds": 0.0,
+                                     "time": time.time(), "error": f"{type(exception).__name__}: {exception}"})
+                await self.think()
+
+
+async def sample_memory(pid, samples, start, stop, interval):
+    while not stop.is_set():
+        rss = rss_mb(pid) if pid else None
+        if rss is not None:
+            samples.append({"seconds": round(time.perf_counter() - start, 2), "rss_mb": round(rss, 1)})
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def load(url, pid, pages, args):
+    results, samples = [], []
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(pid, samples, start, stop, args.sample_interval))
+    sessions = []
+    for number in range(args.sessions):
+        sessions.append(asyncio.create_task(Session(number, pages, args, results, stop).run(url)))
+        # Staggered arrivals, like viewers opening the app one after another
+        await asyncio.sleep(args.ramp_up / max(args.sessions, 1))
+    await asyncio.sleep(max(args.duration - args.ramp_up, 0))
+    stop.set()
+    # Sessions finish the rerun they are waiting for
+    await asyncio.gather(*sessions)
+    await sampler
+    elapsed = time.perf_counter() - start
+    rss = rss_mb(pid) if pid else None
+    if rss is not None:
+        samples.append({"seconds": round(elapsed, 2), "rss_mb": round(rss, 1)})
+    return results, samples, elapsed
+
+
+def report(results, samples, elapsed, args):
+    by_page = {}
+    for result in results:
+        by_page.setdefault(result["page"] or "(connection)", []).append(result)
+
+    def summary(rows):
+        seconds = [row["seconds"] for row in rows if row["error"] is None]
+        values = summarize(seconds) if seconds else {f"p{int(quantile * 100)}": None for quantile in QUANTILES}
+        values.update(count=len(rows), errors=sum(row["error"] is not None for row in rows))
+        return values
+
+    timed = [row for row in results if row["page"]]
+    return {
+        "sessions": args.sessions,
+        "duration": round(elapsed, 2),
+        "think": args.think,
+        "changes_per_page": args.changes,
+        "reruns": len(timed),
+        "throughput": round(len(timed) / elapsed, 2) if elapsed else None,
+        "latency": {"all": summary(timed), **{page: summary(rows) for page, rows in sorted(by_page.items())}},
+        "rss_mb": {"start": samples[0]["rss_mb"], "peak": max(sample["rss_mb"] for sample in samples),
+                   "end": samples[-1]["rss_mb"], "samples": samples} if samples else None,
+        "errors": sorted({row["error"] for row in results if row["error"]}),
+        "python": platform.python_version(),
+    }
+
+
+def print_report(result):
+    print(f"{result['sessions']} sessions, {result['duration']:.0f} s: {result['reruns']} reruns, "
+          f"{result['throughput']} reruns/s")
+    print(f"{'page':28} {'reruns':>7} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for page, summary in result["latency"].items():
+        cells = [f"{summary[name] * 1000:7.0f}ms" if summary[name] is not None else f"{'-':>9}"
+                 for name in ("p50", "p95", "p99")]
+        print(f"{page:28} {summary['count']:>7} {summary['errors']:>7} {' '.join(cells)}")
+    rss = result["rss_mb"]
+    if rss:
+        print(f"server RSS: {rss['start']:.0f} MB at start, {rss['peak']:.0f} MB peak, {rss['end']:.0f} MB at the end")
+    for error in result["errors"]:
+        print(f"error: {error}")
+
+
+def main(args):
+    # Page names as listed in the app's navigation
+    from crime_dashboard.views import PAGES
+
+    server = None
+    url, pid = args.url, args.pid
+    if url is None:
+        port = free_port()
+        server = start_server(port, args.timeout)
+        url, pid = f"ws://127.0.0.1:{port}", server.pid
+    try:
+        results, samples, elapsed = asyncio.run(load(url.rstrip("/"), pid, list(PAGES), args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return report(results, samples, elapsed, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions and report rerun latency")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run (sessions finish their rerun)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which the sessions start")
+    parser.add_argument("--think", type=float, default=1.0, help="mean think time between actions, seconds (0: none)")
+    parser.add_argument("--changes", type=int, default=3, help="random widget changes per page visit")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds a single rerun may take")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="seconds between RSS samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="websocket base URL of a running server, e.g. ws://127.0.0.1:8501 "
+                                      "(default: start one)")
+    parser.add_argument("--pid", type=int, help="process id of that server, for its RSS")
+    parser.add_argument("--output", help="write the report (with every RSS sample) as JSON")
+    args = parser.parse_args()
+
+    result = main(args)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,294 @@
+# Offline prerender: builds the figures of every page for every widget
+# combination (or the N most likely per page) across a process pool and
+# writes them as a static bundle:
+#
+#   <bundle dir>/manifest.json           data version + one entry per view
+#   <bundle dir>/<page>/<id>.json        Plotly JSON of the view's figure(s)
+#   <bundle dir>/<page>/<id>.html        standalone page (plotly.js from the CDN)
+#   <bundle dir>/index.html              links to every HTML view
+#
+# The HTML half can be put behind any static file server. The app looks a
+# view up in the bundle before building it, as long as the bundle was built
+# for the current data version (see views/common.py).
+#
+#   python -m crime_dashboard.prerender                    # all combinations
+#   python -m crime_dashboard.prerender --top 20 --jobs 4  # defaults first, 20 per page
+#   python -m crime_dashboard.prerender --all-years        # also every single year on the scatter page
+import argparse
+import hashlib
+import html
+import importlib
+import itertools
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from crime_dashboard import storage
+from crime_dashboard.figure_cache import figure_key
+
+BUNDLE_DIR = os.environ.get("CRIME_DASHBOARD_BUNDLE_DIR", os.path.join(storage.CACHE_DIR, "prerender"))
+MANIFEST_NAME = "manifest.json"
+
+# Page -> directory name inside the bundle
+PAGE_DIRS = {
+    "Crime Statistics": "crime-statistics",
+    "Education & Crime Analysis": "education-crime",
+    "Socio-Economic Impact": "socio-economic",
+    "Integrated Data Visuals": "integrated",
+}
+
+
+def view_id(key):
+    # Stable file name of a figure_key(); the data version is left out and
+    # checked once for the whole bundle instead
+    page, _, selections = key
+    payload = json.dumps([page, selections], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def first_and_rest(options, default):
+    # The default option first, then the others in their usual order
+    return [default] + [option for option in options if option != default]
+
+
+def combinations(cube, scatter_years):
+    # page -> selection dicts, exactly as the pages pass them to figure_key(),
+    # ordered so the defaults come first and one widget changes at a time
+    # before everything else (--top N keeps the most likely views).
+    # scatter_years: the year selections to render on the scatter page
+    from crime_dashboard.data import education_translation, statistic_group_translation
+    from crime_dashboard.segments import WEIGHTINGS
+    from crime_dashboard.views.crime_statistics import DEFAULT_DISTRICTS
+    from crime_dashboard.views.integrated import MAX_SCATTER_POINTS
+
+    crime_types = first_and_rest(cube.crime_types, "All Crimes")
+    education_crimes = first_and_rest(list(statistic_group_translation.values()), "All Crimes")
+    district_sets = [DEFAULT_DISTRICTS] + [[district] for district in cube.districts]
+    rates = list(education_translation)
+
+    def ordered(*axes):
+        # Cartesian product sorted by how many widgets differ from their default
+        product = itertools.product(*[enumerate(axis) for axis in axes])
+        return [tuple(value for _, value in combo)
+                for combo in sorted(product, key=lambda combo: sum(index > 0 for index, _ in combo))]
+
+    return {
+        "Crime Statistics": [
+            {"crime_type": crime_type, "districts": districts, "weighting": weighting}
+            for crime_type, districts, weighting in ordered(crime_types, district_sets, WEIGHTINGS)],
+        "Education & Crime Analysis": [
+            {"crime_type": crime_type, "rate": rate, "weighting": weighting}
+            for crime_type, rate, weighting in ordered(education_crimes, first_and_rest(rates, "5UnitsMathematicsRate"),
+                                                       WEIGHTINGS)],
+        "Socio-Economic Impact": [
+            {"crime_type": crime_type, "all_points": all_points}
+            for crime_type, all_points in ordered(crime_types, [False, True])],
+        "Integrated Data Visuals": [
+            {"rate": rate, "crime_types": [crime_type], "years": years, "render_mode": "auto",
+             "max_points": MAX_SCATTER_POINTS}
+            for rate, crime_type, years in ordered(first_and_rest(rates, "EligibleForBagrutRate"), crime_types,
+                                                   scatter_years)],
+    }
+
+
+def build_figure(cube, settlement_index, page, selections):
+    # Same builders (and arguments) as the pages use
+    from crime_dashboard import charts
+
+    if page == "Crime Statistics":
+        return charts.crime_statistics_figures(cube, selections["crime_type"], selections["districts"],
+                                               selections["weighting"])
+    if page == "Education & Crime Analysis":
+        return charts.education_crime_figure(cube, selections["crime_type"], selections["rate"], selections["weighting"])
+    if page == "Socio-Economic Impact":
+        return charts.socio_economic_figure(settlement_index, selections["crime_type"], selections["all_points"])
+    return charts.integrated_figure(settlement_index, selections["rate"], selections["crime_types"],
+                                    selections["years"], selections["render_mode"], selections["max_points"])
+
+
+# Aggregates of the worker process, built once by _init_worker
+_worker = {}
+
+
+def _init_worker(version):
+    # Importing Streamlit makes its Plotly template the default, as in the
+    # app, so the stored figures are the ones the pages would build
+    importlib.import_module("streamlit")
+
+    from crime_dashboard.cube import AggregateCube
+    from crime_dashboard.joins import SettlementIndex
+
+    education_df, crimes, _ = storage.load_version(version)
+    _worker["cube"] = AggregateCube(crimes, education_df)
+    _worker["settlement_index"] = SettlementIndex(crimes, education_df)
+
+
+def _render(task):
+    # Build one view and write its files; runs in a worker process
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    page, selections, bundle_dir, write_html = task
+    key = figure_key(page, None, **selections)
+    start = time.perf_counter()
+    figure = build_figure(_worker["cube"], _worker["settlement_index"], page, selections)
+    # Crime Statistics has two figures (the line chart is None when nothing matches)
+    figures = list(figure) if isinstance(figure, tuple) else [figure]
+    build_seconds = time.perf_counter() - start
+
+    name = os.path.join(PAGE_DIRS[page], view_id(key))
+    with open(os.path.join(bundle_dir, name + ".json"), "w", encoding="utf-8") as f:
+        f.write('{"multiple": %s, "figures": [%s]}' % (
+            json.dumps(isinstance(figure, tuple)),
+            ", ".join("null" if fig is None else pio.to_json(fig, validate=False) for fig in figures)))
+
+    entry = {"page": page, "selections": selections, "json": name + ".json", "build_ms": round(build_seconds * 1000, 1)}
+    if write_html:
+        # Outside the app the Streamlit template's theme colors are not
+        # filled in, so the standalone pages use Plotly's own template
+        parts = [pio.to_html(go.Figure(fig).update_layout(template="plotly"), full_html=False,
+                             include_plotlyjs="cdn" if index == 0 else False)
+                 for index, fig in enumerate(fig for fig in figures if fig is not None)]
+        with open(os.path.join(bundle_dir, name + ".html"), "w", encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(page)}</title></head>"
+                    f"<body>\n{''.join(parts)}\n</body></html>\n")
+        entry["html"] = name + ".html"
+    return view_id(key), entry
+
+
+def write_index(bundle_dir, views):
+    # index.html: every HTML view grouped by page
+    lines = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\"><title>Crime dashboard views</title></head><body>"]
+    for page in PAGE_DIRS:
+        lines.append(f"<h2>{html.escape(page)}</h2><ul>")
+        for entry in views.values():
+            if entry["page"] == page and "html" in entry:
+                label = ", ".join(f"{name}: {value}" for name, value in entry["selections"].items())
+                lines.append(f"<li><a href=\"{entry['html']}\">{html.escape(label)}</a></li>")
+        lines.append("</ul>")
+    lines.append("</body></html>")
+    with open(os.path.join(bundle_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def prerender(bundle_dir=BUNDLE_DIR, top=None, jobs=None, all_years=False, write_html=True, pages=None):
+    from crime_dashboard.aggregates import default_year
+    from crime_dashboard.cube import AggregateCube
+
+    # A new bundle replaces the previous one as a whole, but never a
+    # directory that is not a bundle (e.g. a mistyped --output)
+    if os.path.exists(bundle_dir) and not is_bundle(bundle_dir) and os.listdir(bundle_dir):
+        raise ValueError(f"{bundle_dir} is not a prerendered bundle (no {MANIFEST_NAME}); not replacing it")
+
+    version = storage.data_version()
+    education_df, crimes, _ = storage.load_version(version)
+    cube = AggregateCube(crimes, education_df)
+    # The scatter page's default year as the page picks it; --all-years adds
+    # each year on its own
+    year = default_year(cube.years)
+    scatter_years = [[year]] + ([[other] for other in cube.years if other != year] if all_years else [])
+
+    # Built next to the bundle directory and swapped in when complete
+    build_dir = os.path.normpath(bundle_dir) + f".tmp{os.getpid()}"
+    tasks = []
+    for page, selections in combinations(cube, scatter_years).items():
+        if pages and page not in pages:
+            continue
+        for item in selections[:top]:
+            tasks.append((page, item, build_dir, write_html))
+
+    start = time.perf_counter()
+    try:
+        for directory in PAGE_DIRS.values():
+            os.makedirs(os.path.join(build_dir, directory))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(version,)) as pool:
+            views = dict(pool.map(_render, tasks, chunksize=4))
+
+        if write_html:
+            write_index(build_dir, views)
+        manifest = {"version": version, "created": time.time(), "views": views}
+        # The manifest goes last: a bundle without one is never served
+        with open(os.path.join(build_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        replace_bundle(build_dir, bundle_dir)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    return manifest, time.perf_counter() - start
+
+
+def is_bundle(bundle_dir):
+    return os.path.isfile(os.path.join(bundle_dir, MANIFEST_NAME))
+
+
+def replace_bundle(build_dir, bundle_dir):
+    # Move the finished bundle into place; the previous bundle is moved
+    # aside first (a directory can only be renamed over an empty one)
+    old_dir = None
+    if is_bundle(bundle_dir):
+        old_dir = os.path.normpath(bundle_dir) + f".old{os.getpid()}"
+        os.replace(bundle_dir, old_dir)
+    os.replace(build_dir, bundle_dir)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def bundle_stamp(bundle_dir=BUNDLE_DIR):
+    # Changes whenever a new bundle is written (None when there is none)
+    try:
+        return os.stat(os.path.join(bundle_dir, MANIFEST_NAME)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_bundle(version, bundle_dir=BUNDLE_DIR):
+    # view id -> manifest entry of a bundle built for this data version;
+    # empty when there is no bundle or it is stale
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != version:
+        return {}
+    return manifest.get("views", {})
+
+
+def load_figure(views, key, bundle_dir=BUNDLE_DIR):
+    # The prerendered figure(s) of a figure_key(), or None when the bundle
+    # does not have the view
+    entry = views.get(view_id(key))
+    if entry is None:
+        return None
+    import plotly.graph_objects as go
+
+    try:
+        with open(os.path.join(bundle_dir, entry["json"]), encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    figures = [None if fig is None else go.Figure(fig) for fig in stored["figures"]]
+    return tuple(figures) if stored["multiple"] else figures[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prerender every page view into a static Plotly JSON/HTML bundle")
+    parser.add_argument("--output", default=BUNDLE_DIR, help=f"bundle directory (default {BUNDLE_DIR})")
+    parser.add_argument("--top", type=int, help="only the N most likely views per page (defaults first)")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--all-years", action="store_true", help="also prerender each year of the scatter page")
+    parser.add_argument("--no-html", action="store_true", help="only write the Plotly JSON the app reads")
+    parser.add_argument("--page", action="append", choices=list(PAGE_DIRS), help="only this page (repeatable)")
+    args = parser.parse_args()
+
+    try:
+        manifest, seconds = prerender(args.output, args.top, args.jobs, args.all_years, not args.no_html, args.page)
+    except ValueError as error:
+        parser.error(str(error))
+    views = manifest["views"].values()
+    for page in PAGE_DIRS:
+        count = sum(entry["page"] == page for entry in views)
+        if count:
+            print(f"{page:32} {count:4d} views")
+    print(f"{len(manifest['views'])} views for data version {manifest['version']} in {seconds:.1f} s -> {args.output}")
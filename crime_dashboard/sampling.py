@@ -0,0 +1,56 @@
+# Server-side thinning of dense scatter plots. Points are binned on a 2-D
+# grid and one point per occupied cell is kept, plus the outliers, so the
+# shape of the cloud and its extremes survive while the payload stays bounded:
+# the result never has more than max_points rows. Outliers are found per
+# series (e.g. per crime type and year, whose rates differ in scale); when
+# there are more than the budget allows, the most extreme ones are kept.
+import numpy as np
+
+
+def outlier_scores(frame, column, groups=None):
+    # How far each value lies beyond its Tukey fences (1.5 IQR outside the
+    # quartiles of its group), in IQRs; 0 within the fences
+    values = frame[column].astype("float64")
+    if groups:
+        grouped = values.groupby([frame[group] for group in groups], observed=True, sort=False)
+        q1, q3 = grouped.transform("quantile", 0.25), grouped.transform("quantile", 0.75)
+    else:
+        q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    iqr = q3 - q1
+    beyond = np.maximum(q1 - 1.5 * iqr - values, values - (q3 + 1.5 * iqr)).to_numpy()
+    iqr = np.broadcast_to(np.asarray(iqr, dtype="float64"), beyond.shape)
+    scores = beyond / np.where(iqr > 0, iqr, 1.0)
+    return np.where(scores > 0, scores, 0.0)
+
+
+def grid_sample(x_values, y_values, rows, budget):
+    # The first of `rows` in every occupied cell of a grid with at most
+    # `budget` cells over their range
+    if budget < 1 or not len(rows):
+        return rows[:0]
+    side = int(np.sqrt(budget))
+    x_bins = np.linspace(np.nanmin(x_values[rows]), np.nanmax(x_values[rows]), side + 1)[1:-1]
+    y_bins = np.linspace(np.nanmin(y_values[rows]), np.nanmax(y_values[rows]), side + 1)[1:-1]
+    cells = np.digitize(x_values[rows], x_bins) * side + np.digitize(y_values[rows], y_bins)
+    _, first = np.unique(cells, return_index=True)
+    return rows[first]
+
+
+def downsample(frame, x, y, max_points, groups=None):
+    # At most max_points rows of frame, in their original order; groups:
+    # columns whose value combinations are separate series for the outliers
+    if len(frame) <= max_points:
+        return frame
+
+    x_values = frame[x].to_numpy(dtype="float64")
+    y_values = frame[y].to_numpy(dtype="float64")
+    scores = np.maximum(outlier_scores(frame, x, groups), outlier_scores(frame, y, groups))
+    outliers, inliers = np.flatnonzero(scores > 0), np.flatnonzero(scores == 0)
+
+    # Outliers get up to half the budget while there is a cloud to draw, and
+    # whatever the grid leaves unused
+    outlier_budget = min(len(outliers), max_points // 2 if len(inliers) else max_points)
+    cloud = grid_sample(x_values, y_values, inliers, max_points - outlier_budget)
+    outlier_budget = min(len(outliers), max_points - len(cloud))
+    extreme = outliers[np.argsort(-scores[outliers], kind="stable")[:outlier_budget]]
+    return frame.iloc[np.sort(np.concatenate([extreme, cloud]))]
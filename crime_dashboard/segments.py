@@ -0,0 +1,96 @@
+# Grouped crime rates as segment sums over integer group codes.
+#
+# Every row gets one flat code for its combination of key values (categorical
+# codes, or factorized codes for other columns), and each group's sums are a
+# single np.bincount. Two ways to roll settlements up to a group:
+#
+#   mean      the plain mean of the settlements' CrimeRate (every settlement
+#             counts the same, and the rates are already rounded)
+#   weighted  sum(Count) / sum(NumResidents): the group's crimes per
+#             resident, from the exact counts, so large settlements weigh
+#             in with their population. The residents are those of the
+#             whole population of the group (e.g. every settlement of the
+#             district in that year), not only of the settlements with a
+#             row for the crime type
+import numpy as np
+import pandas as pd
+
+WEIGHTINGS = ("mean", "weighted")
+
+# How the pages label the weightings
+WEIGHTING_LABELS = {"mean": "Average of settlements", "weighted": "Population-weighted"}
+
+
+def group_codes(frame, keys):
+    # (flat group code per row, the values of each key, the shape of the
+    # code space); rows with a missing key value get code -1
+    codes, levels = [], []
+    for key in keys:
+        column = frame[key]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes.append(column.cat.codes.to_numpy().astype("int64"))
+            levels.append(column.cat.categories)
+        else:
+            code, uniques = pd.factorize(column, sort=True)
+            codes.append(code.astype("int64"))
+            levels.append(pd.Index(uniques))
+    shape = tuple(len(level) for level in levels)
+
+    missing = np.zeros(len(frame), dtype=bool)
+    for code in codes:
+        missing |= code < 0
+    flat = np.ravel_multi_index([np.where(missing, 0, code) for code in codes], shape) if codes else np.zeros(0)
+    return np.where(missing, -1, flat), levels, shape
+
+
+def population_residents(population, keys, levels, shape, observed):
+    # Residents of the observed groups (flat codes) from the population
+    # rows, summed over the keys the population has (e.g. district and year,
+    # not crime type)
+    shared = [position for position, key in enumerate(keys) if key in population.columns]
+    codes = [levels[position].get_indexer(population[keys[position]]) for position in shared]
+    present = np.ones(len(population), dtype=bool)
+    for code in codes:
+        present &= code >= 0
+    sub_shape = tuple(shape[position] for position in shared)
+    totals = np.bincount(np.ravel_multi_index([code[present] for code in codes], sub_shape),
+                         weights=population["NumResidents"].to_numpy()[present], minlength=int(np.prod(sub_shape)))
+    positions = np.unravel_index(observed, shape)
+    return totals[np.ravel_multi_index([positions[position] for position in shared], sub_shape)]
+
+
+def segment_rates(frame, keys, weighting="mean", population=None):
+    # Series of the rate per observed combination of `keys` (a MultiIndex in
+    # key order, sorted like groupby(..., observed=True)). population: for
+    # the weighted rate, rows with each member's NumResidents once (the
+    # "all crimes" rows: one per settlement and year); by default the
+    # frame's own rows
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"unknown weighting {weighting!r}; expected one of: {', '.join(WEIGHTINGS)}")
+    flat, levels, shape = group_codes(frame, keys)
+    present = flat >= 0
+    flat = flat[present]
+    size = int(np.prod(shape))
+
+    rows = np.bincount(flat, minlength=size)
+    if weighting == "weighted":
+        numerator = np.bincount(flat, weights=frame["Count"].to_numpy()[present], minlength=size)
+        denominator = np.bincount(flat, weights=frame["NumResidents"].to_numpy()[present], minlength=size)
+    else:
+        numerator = np.bincount(flat, weights=frame["CrimeRate"].to_numpy()[present], minlength=size)
+        denominator = rows
+
+    observed = np.flatnonzero(rows)
+    if weighting == "weighted" and population is not None:
+        denominator = population_residents(population, keys, levels, shape, observed)
+    else:
+        denominator = denominator[observed]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = numerator[observed] / denominator
+    positions = np.unravel_index(observed, shape)
+    # Categorical keys stay categorical, so later unstacks keep their order
+    index = pd.MultiIndex.from_arrays(
+        [pd.Categorical.from_codes(position, categories=level) if isinstance(frame[key].dtype, pd.CategoricalDtype)
+         else level.take(position) for key, level, position in zip(keys, levels, positions)],
+        names=keys)
+    return pd.Series(values.astype("float32"), index=index, name="CrimeRate")
@@ -0,0 +1,187 @@
+# One copy of the datasets per host, shared by every app worker process.
+#
+# A loader process publishes the typed columns of both frames as raw .npy
+# arrays (categoricals as their integer codes, the categories in meta.json)
+# under <shared dir>/<data version>/, then points CURRENT at that version.
+# Workers memory-map the arrays read-only and build their frames on top of
+# them without copying, so all workers read the same physical pages (tmpfs
+# under /dev/shm by default) and resident memory per host stays about flat as
+# workers are added. A new version is picked up on the next rerun after
+# CURRENT moves; the previous version is kept for workers still reading it.
+#
+#   python -m crime_dashboard.shared            # publish the current data once
+#   python -m crime_dashboard.shared --watch 30 # and again whenever it changes
+#   CRIME_DASHBOARD_SHARED=1 streamlit run NewDashboard.py
+#
+# The publisher and the app find the shared dir the same way: the
+# CRIME_DASHBOARD_SHARED_DIR environment variable, else /dev/shm/
+# crime_dashboard (.cache/shared without /dev/shm). Set it for both sides.
+#
+# Without the environment variable (or before anything is published) the app
+# loads the data itself, as before.
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from crime_dashboard import storage, summary
+
+ENABLED = os.environ.get("CRIME_DASHBOARD_SHARED", "") not in ("", "0")
+SHARED_DIR = os.environ.get("CRIME_DASHBOARD_SHARED_DIR") or (
+    "/dev/shm/crime_dashboard" if os.path.isdir("/dev/shm") else os.path.join(storage.CACHE_DIR, "shared"))
+POINTER_NAME = "CURRENT"
+
+# Published versions kept on disk: the current one and the one before it
+KEEP_VERSIONS = 2
+
+FRAMES = ("education", "crimes")
+
+
+def version_dir(version, shared_dir=SHARED_DIR):
+    return os.path.join(shared_dir, version)
+
+
+def write_columns(frame, path):
+    # Column name -> how to rebuild it; the arrays go to <path>/<n>.npy
+    columns = []
+    for number, name in enumerate(frame.columns):
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values = column.cat.codes.to_numpy()
+            columns.append({"name": name, "categories": column.cat.categories.tolist(),
+                            "ordered": bool(column.cat.ordered)})
+        else:
+            values = column.to_numpy()
+            columns.append({"name": name})
+        np.save(os.path.join(path, f"{number}.npy"), np.ascontiguousarray(values), allow_pickle=False)
+    return {"rows": len(frame), "columns": columns}
+
+
+def read_columns(layout, path):
+    # Frame over read-only memory maps of the published arrays (no copy)
+    columns = {}
+    for number, column in enumerate(layout["columns"]):
+        values = np.load(os.path.join(path, f"{number}.npy"), mmap_mode="r", allow_pickle=False)
+        if "categories" in column:
+            dtype = pd.CategoricalDtype(column["categories"], ordered=column["ordered"])
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        columns[column["name"]] = values
+    return pd.DataFrame(columns, index=pd.RangeIndex(layout["rows"]), copy=False)
+
+
+def read_pointer(shared_dir=SHARED_DIR):
+    try:
+        with open(os.path.join(shared_dir, POINTER_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def current_version(shared_dir=SHARED_DIR):
+    # The published data version, None before the first publish
+    return read_pointer(shared_dir).get("version")
+
+
+def publish(education_df, crimes, version, partitions=None, shared_dir=SHARED_DIR):
+    # Write the version's arrays to a temporary directory, rename it into
+    # place, then move CURRENT; readers never see a partial version
+    os.makedirs(shared_dir, exist_ok=True)
+    target = version_dir(version, shared_dir)
+    if not os.path.exists(target):
+        tmp_dir = target + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        meta = {"version": version, "partitions": partitions or {}, "frames": {},
+                "summary": summary.summarize(education_df, crimes)}
+        for name, frame in zip(FRAMES, (education_df, crimes)):
+            os.makedirs(os.path.join(tmp_dir, name))
+            meta["frames"][name] = write_columns(frame, os.path.join(tmp_dir, name))
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.rename(tmp_dir, target)
+
+    history = [version] + [old for old in read_pointer(shared_dir).get("history", []) if old != version]
+    pointer = {"version": version, "published": time.time(), "history": history[:KEEP_VERSIONS]}
+    tmp_path = os.path.join(shared_dir, POINTER_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pointer, f)
+    os.replace(tmp_path, os.path.join(shared_dir, POINTER_NAME))
+
+    # Unlinking is safe for workers that still map an old version: the pages
+    # stay valid until they unmap them
+    for old in history[KEEP_VERSIONS:]:
+        shutil.rmtree(version_dir(old, shared_dir), ignore_errors=True)
+    return target
+
+
+def attach(version, shared_dir=SHARED_DIR):
+    # (education, crimes, partition versions) of a published version
+    path = version_dir(version, shared_dir)
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    education_df, crimes = (read_columns(meta["frames"][name], os.path.join(path, name)) for name in FRAMES)
+    return education_df, crimes, meta["partitions"]
+
+
+def published_summary(version, shared_dir=SHARED_DIR):
+    # The Overview numbers of a published version; None if it has none
+    try:
+        with open(os.path.join(version_dir(version, shared_dir), "meta.json"), encoding="utf-8") as f:
+            return json.load(f).get("summary")
+    except (OSError, ValueError):
+        return None
+
+
+def data_version():
+    # The version the app should show: the published one in shared mode,
+    # else that of the local cache (storage.data_version)
+    version = current_version() if ENABLED else None
+    return version or storage.data_version()
+
+
+def load(version):
+    # (education, crimes, partition versions, shared) for `version`; attached
+    # to the published arrays when they exist, else loaded in this process
+    if ENABLED and os.path.exists(os.path.join(version_dir(version), "meta.json")):
+        return *attach(version), True
+    return *storage.load_version(version), False
+
+
+def published_size(version, shared_dir=SHARED_DIR):
+    path = version_dir(version, shared_dir)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def publish_current(shared_dir=SHARED_DIR, force=False):
+    # Publish the local data unless CURRENT already points at its version
+    version = storage.data_version()
+    if not force and current_version(shared_dir) == version:
+        return version, False
+    education_df, crimes, partitions = storage.load_version(version)
+    if force:
+        shutil.rmtree(version_dir(version, shared_dir), ignore_errors=True)
+    publish(education_df, crimes, version, partitions, shared_dir)
+    return version, True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the datasets for the app workers of this host")
+    parser.add_argument("--force", action="store_true", help="publish again even if the version is current")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running and publish whenever the data changes")
+    args = parser.parse_args()
+
+    while True:
+        version, published = publish_current(force=args.force)
+        if published:
+            size = published_size(version) / 1e6
+            print(f"published {version} -> {version_dir(version)} ({size:.1f} MB)", flush=True)
+        elif not args.watch:
+            print(f"{version} is already published in {SHARED_DIR}")
+        if not args.watch:
+            break
+        args.force = False
+        time.sleep(args.watch)
@@ -0,0 +1,80 @@
+# Startup report: how long a fresh process takes to import the app core and
+# then each page module, measured against an import-time budget.
+#
+# Every measurement runs in a new interpreter, so nothing is already imported
+# (as in a container cold start or a new autoscaled replica).
+#
+#   python -m crime_dashboard.startup              # exit 1 when over budget
+#   python -m crime_dashboard.startup --json
+import argparse
+import json
+import subprocess
+import sys
+
+from crime_dashboard import views
+
+# Modules the app imports before any page is opened (see NewDashboard.py)
+CORE_MODULES = ["streamlit", "crime_dashboard.storage", "crime_dashboard.tracing", "crime_dashboard.views.common"]
+
+# Seconds allowed for the core imports and, on top of them, for each page module
+CORE_BUDGET = 1.5
+PAGE_BUDGET = 0.75
+
+# Modules that must not be imported before a chart page is opened
+DEFERRED_MODULES = ["plotly.express", "crime_dashboard.charts"]
+
+_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {core!r}:
+    importlib.import_module(name)
+core = time.perf_counter() - start
+loaded = [name for name in {deferred!r} if name in sys.modules]
+start = time.perf_counter()
+if {page!r}:
+    importlib.import_module({page!r})
+print(json.dumps({{"core": core, "page": time.perf_counter() - start, "deferred_loaded": loaded}}))
+"""
+
+
+def measure(page_module=None, python=sys.executable):
+    code = _PROBE.format(core=CORE_MODULES, deferred=DEFERRED_MODULES, page=page_module)
+    result = subprocess.run([python, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(core_budget=CORE_BUDGET, page_budget=PAGE_BUDGET):
+    core = measure()
+    pages = {page: measure(module)["page"] for page, module in views.PAGES.items()}
+    over_budget = [page for page, seconds in pages.items() if seconds > page_budget]
+    if core["core"] > core_budget:
+        over_budget.insert(0, "core")
+    return {
+        "core": core["core"],
+        "pages": pages,
+        "deferred_loaded_by_core": core["deferred_loaded"],
+        "budget": {"core": core_budget, "page": page_budget},
+        "over_budget": over_budget,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the app's import time against the startup budget")
+    parser.add_argument("--core-budget", type=float, default=CORE_BUDGET)
+    parser.add_argument("--page-budget", type=float, default=PAGE_BUDGET)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    result = report(args.core_budget, args.page_budget)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'core':32} {result['core'] * 1000:8.0f} ms  (budget {args.core_budget * 1000:.0f} ms)")
+        for page, seconds in result["pages"].items():
+            print(f"{page:32} {seconds * 1000:8.0f} ms  (budget {args.page_budget * 1000:.0f} ms)")
+        if result["deferred_loaded_by_core"]:
+            print("imported before any chart page: " + ", ".join(result["deferred_loaded_by_core"]))
+        if result["over_budget"]:
+            print("over budget: " + ", ".join(result["over_budget"]))
+
+    sys.exit(1 if result["over_budget"] or result["deferred_loaded_by_core"] else 0)
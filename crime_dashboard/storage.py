@@ -0,0 +1,452 @@
+# Binary columnar cache for the two datasets.
+#
+# `python -m crime_dashboard.storage` converts DataEducation2023.xlsx and
+# final_crimes_updated.csv into uncompressed Feather (Arrow IPC) files that
+# are memory-mapped on load; the crimes are stored as one file per year. A
+# manifest records each source's mtime, size and sha256 so a changed source
+# is rebuilt automatically; without a cache the loader simply reads the raw
+# files. It also carries the numbers of the Overview page (summary.py), so
+# the landing page is shown without loading either dataset.
+#
+# Cache files are named by their content (crimes/2023-<sha256>.feather) and
+# never rewritten. Each build records the manifest of its data version in
+# versions/<version>.json, so a running app loads exactly the version it
+# asked for (load_version) while a newer one is being built next to it. The
+# files of the last KEEP_VERSIONS versions are kept; older ones are removed.
+#
+# A new year is added without touching the published CSV or the other years:
+#
+#   python -m crime_dashboard.storage --append crimes_2025.csv
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from crime_dashboard import data, summary
+
+CACHE_DIR = os.environ.get("CRIME_DASHBOARD_CACHE_DIR", ".cache")
+MANIFEST_NAME = "manifest.json"
+VERSIONS_DIR = "versions"
+
+# Data versions whose files are kept: the current one and the one before it,
+# which an app may still serve until it has swapped to the new one
+KEEP_VERSIONS = 2
+
+# Bump when prepare_crimes/prepare_education change the cached columns
+# (2: crimes stored as one file per year, 3: education summary in the manifest,
+# 4: crime labels per partition, 5: files named by content, one manifest per version)
+SCHEMA_VERSION = 5
+
+
+def read_education(path):
+    return data.prepare_education(pd.read_excel(path))
+
+
+def read_crimes(path):
+    return data.prepare_crimes(pd.read_csv(path))
+
+
+# Cached datasets: name -> (raw source path, raw reader)
+SOURCES = {
+    "education": (data.EDUCATION_PATH, read_education),
+    "crimes": (data.CRIMES_PATH, read_crimes),
+}
+
+# Datasets stored as one file per value of a column: <cache>/crimes/2020.feather, ...
+PARTITION_COLUMNS = {"crimes": "Year"}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path, previous=None):
+    # Re-hash only when mtime or size moved since the previous fingerprint
+    stat = os.stat(path)
+    if previous and previous.get("mtime_ns") == stat.st_mtime_ns and previous.get("size") == stat.st_size:
+        sha256 = previous["sha256"]
+    else:
+        sha256 = file_hash(path)
+    return {"source": path, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+
+
+def read_manifest(cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        return {}
+    return manifest
+
+
+def write_manifest(manifest, cache_dir=CACHE_DIR):
+    manifest = dict(manifest, schema_version=SCHEMA_VERSION)
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_frame(frame, path):
+    # Uncompressed so the file can be memory-mapped; write-then-rename so a
+    # reader never sees a half written file
+    tmp_path = path + ".tmp"
+    feather.write_feather(frame, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def write_cache_file(frame, directory, stem):
+    # Write frame as <directory>/<stem>-<sha256 prefix>.feather; returns
+    # (file name, sha256). A file named by its content is never rewritten,
+    # so it stays valid for whoever still reads it
+    tmp_path = os.path.join(directory, stem + ".feather.tmp")
+    feather.write_feather(frame, tmp_path, compression="uncompressed")
+    sha256 = file_hash(tmp_path)
+    name = f"{stem}-{sha256[:12]}.feather"
+    os.replace(tmp_path, os.path.join(directory, name))
+    return name, sha256
+
+
+def read_frame(path):
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def cache_path(name, entry, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, entry["file"])
+
+
+def partition_path(name, partition, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, name, partition["file"])
+
+
+def write_partition(frame, name, key, cache_dir=CACHE_DIR):
+    file, sha256 = write_cache_file(frame.reset_index(drop=True), os.path.join(cache_dir, name), str(key))
+    entry = {"rows": len(frame), "sha256": sha256, "file": file}
+    if name == "crimes":
+        # Yearly total of the "all crimes" rows (StatisticGroupKod == -2), and
+        # the year's crime types and districts (summary.py)
+        entry["total"] = int(frame.loc[frame["StatisticGroupKod"] == -2, "Count"].sum())
+        entry.update(summary.crime_labels(frame))
+    return entry
+
+
+def write_partitions(frame, name, cache_dir=CACHE_DIR):
+    # One file per partition key; returns key -> {rows, sha256, file, ...}
+    os.makedirs(os.path.join(cache_dir, name), exist_ok=True)
+    return {str(key): write_partition(part, name, key, cache_dir)
+            for key, part in frame.groupby(PARTITION_COLUMNS[name], sort=True)}
+
+
+def read_partitions(name, partitions, cache_dir=CACHE_DIR):
+    # All partitions share their categorical dtypes, so concatenating the
+    # Arrow tables in key order gives the same frame as unpartitioned data
+    tables = [feather.read_table(partition_path(name, partitions[key], cache_dir), memory_map=True)
+              for key in sorted(partitions, key=int)]
+    return pa.concat_tables(tables).to_pandas()
+
+
+def merge_partitions(name, frame, additions):
+    # Rows of each addition replace the partitions (years) it contains
+    column = PARTITION_COLUMNS[name]
+    for addition in additions:
+        dtypes = data.crime_categories([frame, addition])
+        kept = frame[~frame[column].isin(addition[column].unique())]
+        frame = pd.concat([kept.astype(dtypes), addition.astype(dtypes)], ignore_index=True)
+        frame = frame.sort_values(column, kind="stable").reset_index(drop=True)
+    return frame
+
+
+def read_source(name, entry=None):
+    # The raw source plus the partitions added with append_partitions
+    source, reader = SOURCES[name]
+    frame = reader(source)
+    appended = (entry or {}).get("appended", {})
+    if appended:
+        frame = merge_partitions(name, frame, [reader(path) for path in appended])
+    return frame
+
+
+def cache_exists(name, entry, cache_dir=CACHE_DIR):
+    if name in PARTITION_COLUMNS:
+        partitions = entry.get("partitions")
+        return bool(partitions) and all("file" in partition and
+                                        os.path.exists(partition_path(name, partition, cache_dir))
+                                        for partition in partitions.values())
+    return "file" in entry and os.path.exists(cache_path(name, entry, cache_dir))
+
+
+def read_cache(name, entry, cache_dir=CACHE_DIR):
+    if name in PARTITION_COLUMNS:
+        return read_partitions(name, entry["partitions"], cache_dir)
+    return read_frame(cache_path(name, entry, cache_dir))
+
+
+def sources_version(entries):
+    # Short id of the sources described by manifest entries (their sha256
+    # and those of the appended partitions)
+    digest = hashlib.sha256(str(SCHEMA_VERSION).encode())
+    for name in sorted(SOURCES):
+        entry = entries[name]
+        digest.update(entry["sha256"].encode())
+        for path, appended in sorted(entry.get("appended", {}).items()):
+            digest.update(appended["sha256"].encode())
+    return digest.hexdigest()[:12]
+
+
+def snapshot_path(version, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, VERSIONS_DIR, version + ".json")
+
+
+def read_snapshot(version, cache_dir=CACHE_DIR):
+    # Manifest sources of a built data version; None if it was not built
+    # (or its files were removed since)
+    try:
+        with open(snapshot_path(version, cache_dir), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("schema_version") != SCHEMA_VERSION:
+        return None
+    entries = snapshot["sources"]
+    return entries if all(cache_exists(name, entries[name], cache_dir) for name in SOURCES) else None
+
+
+def cache_files(name, entry):
+    if name in PARTITION_COLUMNS:
+        return {os.path.join(name, partition["file"]) for partition in entry.get("partitions", {}).values()}
+    return {entry["file"]} if "file" in entry else set()
+
+
+def commit(manifest, cache_dir=CACHE_DIR):
+    # Write the manifest and the snapshot of its data version, then remove
+    # the snapshots and files of versions older than the last KEEP_VERSIONS
+    entries = manifest.get("sources", {})
+    if all(name in entries for name in SOURCES):
+        version = sources_version(entries)
+        os.makedirs(os.path.join(cache_dir, VERSIONS_DIR), exist_ok=True)
+        path = snapshot_path(version, cache_dir)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"schema_version": SCHEMA_VERSION, "version": version, "sources": entries}, f,
+                      indent=2, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        manifest["history"] = [version] + [old for old in manifest.get("history", []) if old != version]
+    write_manifest(manifest, cache_dir)
+
+    kept = manifest.get("history", [])[:KEEP_VERSIONS]
+    used = {file for name, entry in entries.items() for file in cache_files(name, entry)}
+    for version in kept:
+        snapshot = read_snapshot(version, cache_dir) or {}
+        used |= {file for name, entry in snapshot.items() for file in cache_files(name, entry)}
+    for path in glob.glob(snapshot_path("*", cache_dir)):
+        if os.path.basename(path)[:-len(".json")] not in kept:
+            os.remove(path)
+    # Cache files no kept version uses, including those of older layouts
+    # (education.feather, crimes.feather, crimes/2020.feather)
+    for name in SOURCES:
+        for path in glob.glob(os.path.join(cache_dir, name + "*.feather")) + \
+                glob.glob(os.path.join(cache_dir, name, "*.feather")):
+            if os.path.relpath(path, cache_dir) not in used:
+                os.remove(path)
+
+
+def build(cache_dir=CACHE_DIR, names=None, force=False):
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = read_manifest(cache_dir)
+    entries = manifest.get("sources", {})
+
+    for name in names or SOURCES:
+        source, reader = SOURCES[name]
+        previous = entries.get(name)
+        current = fingerprint(source, previous)
+        if not force and previous and previous["sha256"] == current["sha256"] \
+                and cache_exists(name, previous, cache_dir):
+            entries[name] = dict(previous, **current)
+            continue
+
+        # The files of the current version stay until a later build (commit)
+        frame = read_source(name, previous)
+        if name in PARTITION_COLUMNS:
+            current["partitions"] = write_partitions(frame, name, cache_dir)
+            if previous and previous.get("appended"):
+                current["appended"] = previous["appended"]
+        else:
+            current["file"], _ = write_cache_file(frame, cache_dir, name)
+        if name == "education":
+            current["summary"] = summary.education_summary(frame)
+        entries[name] = current
+
+    manifest["sources"] = entries
+    commit(manifest, cache_dir)
+    return manifest
+
+
+def append_partitions(path, name="crimes", cache_dir=CACHE_DIR):
+    # Add or replace the partitions found in `path` (e.g. a new year of
+    # crimes in the final_crimes_updated.csv format). The other partitions
+    # are only rewritten when the file brings new categories (e.g. a new
+    # settlement), and then only re-encoded, not recomputed
+    manifest = build(cache_dir)
+    entry = manifest["sources"][name]
+    partitions = dict(entry["partitions"])
+    _, reader = SOURCES[name]
+    addition = reader(path)
+    keys = {str(key) for key in addition[PARTITION_COLUMNS[name]].unique()}
+
+    # Any one partition carries the dtypes of all of them
+    first = next(iter(partitions))
+    sample = read_partitions(name, {first: partitions[first]}, cache_dir)
+    dtypes = data.crime_categories([sample, addition])
+    if any(sample[column].dtype != dtype for column, dtype in dtypes.items()):
+        for key in set(partitions) - keys:
+            frame = read_partitions(name, {key: partitions[key]}, cache_dir).astype(dtypes)
+            partitions[key] = write_partition(frame, name, key, cache_dir)
+
+    partitions.update(write_partitions(addition.astype(dtypes), name, cache_dir))
+    entry = dict(entry, partitions=dict(sorted(partitions.items(), key=lambda item: int(item[0]))))
+    entry["appended"] = dict(entry.get("appended", {}), **{path: fingerprint(path)})
+    manifest["sources"] = dict(manifest["sources"], **{name: entry})
+    commit(manifest, cache_dir)
+    return sorted(keys, key=int)
+
+
+def version_sources(version, cache_dir=CACHE_DIR):
+    # Manifest sources of data version `version`, building the cache first
+    # when it is the current version and was not built yet. LookupError when
+    # the version is neither built nor current (e.g. a source changed again)
+    entries = read_snapshot(version, cache_dir)
+    if entries is None and data_version(cache_dir) == version:
+        build(cache_dir)
+        entries = read_snapshot(version, cache_dir)
+    if entries is None:
+        raise LookupError(f"data version {version} is not in the cache {cache_dir}")
+    return entries
+
+
+def load_version(version, cache_dir=CACHE_DIR):
+    # (education, crimes, partition versions) of data version `version`;
+    # from the raw files when the cache directory is not writable
+    try:
+        entries = version_sources(version, cache_dir)
+    except OSError:
+        if data_version(cache_dir) != version:
+            raise
+        manifest = read_manifest(cache_dir).get("sources", {})
+        return read_source("education"), read_source("crimes", manifest.get("crimes")), {}
+    return (read_cache("education", entries["education"], cache_dir),
+            read_cache("crimes", entries["crimes"], cache_dir), partition_versions(cache_dir, entries))
+
+
+def load_data(cache_dir=CACHE_DIR):
+    education_df, crimes, _ = load_version(data_version(cache_dir), cache_dir)
+    return education_df, crimes
+
+
+def data_version(cache_dir=CACHE_DIR):
+    # Short id of the current source contents (and appended partitions);
+    # cheap when the manifest's mtime/size still match (no hashing needed)
+    entries = read_manifest(cache_dir).get("sources", {})
+    current = {name: dict(entries.get(name) or {}, **fingerprint(source, entries.get(name)))
+               for name, (source, _) in SOURCES.items()}
+    unchanged = all(entries.get(name, {}).get("sha256") == current[name]["sha256"] for name in SOURCES)
+    if unchanged and any(entries[name]["mtime_ns"] != current[name]["mtime_ns"] for name in SOURCES):
+        # Touched but unchanged: remember the new mtime to skip re-hashing
+        try:
+            build(cache_dir)
+        except OSError:
+            pass
+    return sources_version(current)
+
+
+def read_summary(cache_dir=CACHE_DIR, version=None):
+    # The Overview numbers and widget options (summary.py) of a built data
+    # version, or of the cached data; None without a cache or when a source
+    # changed since it was built
+    if version is not None:
+        entries = read_snapshot(version, cache_dir)
+        if entries is None:
+            return None
+    else:
+        entries = read_manifest(cache_dir).get("sources", {})
+        for name, (source, _) in SOURCES.items():
+            entry = entries.get(name)
+            if entry is None or fingerprint(source, entry)["sha256"] != entry["sha256"]:
+                return None
+    education, partitions = entries["education"], entries["crimes"]["partitions"]
+    if "summary" not in education or not all("total" in entry and "crime_types" in entry
+                                              for entry in partitions.values()):
+        return None
+    years = {key: partition["total"] for key, partition in partitions.items()}
+    # Labels in order of first appearance over the years in order, as in
+    # the frame read_partitions gives
+    crime_types, districts = {}, {}
+    for key in sorted(partitions, key=int):
+        crime_types.update(dict.fromkeys(partitions[key]["crime_types"]))
+        districts.update(dict.fromkeys(partitions[key]["districts"]))
+    return {"years": years, "crime_types": list(crime_types), "districts": list(districts), **education["summary"]}
+
+
+def partition_versions(cache_dir=CACHE_DIR, entries=None):
+    # name -> source sha256 and "name/key" -> partition sha256 (of the given
+    # manifest entries, else of the cache), so consumers can tell which
+    # partitions changed between two data versions
+    versions = {}
+    entries = read_manifest(cache_dir).get("sources", {}) if entries is None else entries
+    for name, entry in entries.items():
+        versions[name] = entry["sha256"]
+        for key, partition in entry.get("partitions", {}).items():
+            versions[f"{name}/{key}"] = partition["sha256"]
+    return versions
+
+
+def changed_partitions(old, new, name="crimes"):
+    # Keys of the `name` partitions added or changed between two
+    # partition_versions() results; None when anything else changed (or a
+    # partition was removed), i.e. when nothing can be updated incrementally
+    if not old or not new:
+        return None
+    prefix = name + "/"
+
+    def split(versions):
+        partitions = {key[len(prefix):]: sha for key, sha in versions.items() if key.startswith(prefix)}
+        others = {key: sha for key, sha in versions.items() if not key.startswith(prefix) and key != name}
+        return partitions, others
+
+    (old_partitions, old_others), (new_partitions, new_others) = split(old), split(new)
+    if old_others != new_others or set(old_partitions) - set(new_partitions):
+        return None
+    changed = {int(key) for key, sha in new_partitions.items() if old_partitions.get(key) != sha}
+    return changed or None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the columnar cache for the dashboard datasets")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the sources did not change")
+    parser.add_argument("--append", action="append", default=[], metavar="CSV",
+                        help="add or replace the crime years in this file (final_crimes_updated.csv format)")
+    args = parser.parse_args()
+
+    result = build(args.cache_dir, force=args.force)
+    for path in args.append:
+        years = append_partitions(path, "crimes", args.cache_dir)
+        print(f"crimes: wrote year(s) {', '.join(years)} from {path}")
+        result = read_manifest(args.cache_dir)
+
+    for name, entry in result["sources"].items():
+        if name in PARTITION_COLUMNS:
+            keys = ", ".join(entry["partitions"])
+            print(f"{name}: {entry['source']} -> {os.path.join(args.cache_dir, name)} [{keys}] ({entry['sha256'][:12]})")
+        else:
+            print(f"{name}: {entry['source']} -> {cache_path(name, entry, args.cache_dir)} ({entry['sha256'][:12]})")
@@ -0,0 +1,66 @@
+# The few numbers the Overview page shows and the options of the pages'
+# widgets, computed when the data is built so a page never has to load the
+# datasets before it can look up a prerendered or cached view:
+#
+#   years        crime year -> crimes of all types (the "all crimes" rows,
+#                StatisticGroupKod == -2)
+#   crime_types  crime types the pages show, in order of first appearance
+#   districts    districts, in order of first appearance
+#   features     education rate -> its min, max and mean over the settlements
+#   groups       socio-economic group -> number of settlements
+#
+# storage.build keeps them in the cache manifest (the yearly totals and
+# labels per crimes partition) and shared.publish in the published
+# meta.json; views/common.load_summary picks the one of the shown version.
+from crime_dashboard.data import education_translation, hebrew_crime_categories
+
+KEYS = ("years", "crime_types", "districts", "features", "groups")
+
+
+def education_summary(education_df):
+    features = education_df[list(education_translation)].agg(["min", "max", "mean"])
+    groups = education_df.groupby("SocioeconomicGroup")["Settlement"].nunique()
+    return {
+        "features": {feature: {stat: float(features.loc[stat, feature]) for stat in ("min", "max", "mean")}
+                     for feature in education_translation},
+        "groups": {str(int(group)): int(count) for group, count in groups.items()},
+    }
+
+
+def yearly_totals(crimes):
+    # As backends.yearly_totals, with JSON keys
+    totals = crimes.loc[crimes["StatisticGroupKod"] == -2].groupby("Year")["Count"].sum()
+    return {str(int(year)): int(count) for year, count in totals.items()}
+
+
+def crime_labels(crimes):
+    # Crime types and districts of the shown rows in order of first
+    # appearance, as cube.AggregateCube.set_labels lists them
+    shown = crimes[~crimes["StatisticGroup"].isin(hebrew_crime_categories)]
+    return {"crime_types": shown["StatisticGroupEn"].unique().astype(str).tolist(),
+            "districts": shown["DistrictNameEn"].unique().astype(str).tolist()}
+
+
+def summarize(education_df, crimes):
+    return {"years": yearly_totals(crimes), **crime_labels(crimes), **education_summary(education_df)}
+
+
+def from_backend(backend):
+    # The same numbers from a loaded query backend (backends.py)
+    return {"years": {str(int(year)): int(count) for year, count in backend.yearly_totals().items()},
+            "crime_types": list(backend.crime_types), "districts": list(backend.districts),
+            **education_summary(backend.education)}
+
+
+def parse(summary):
+    # Summary as written (JSON: string keys) -> years and groups as ints,
+    # years ascending; None for None or a summary written without every key
+    if summary is None or not all(key in summary for key in KEYS):
+        return None
+    return {
+        "years": {int(year): count for year, count in sorted(summary["years"].items(), key=lambda item: int(item[0]))},
+        "crime_types": summary["crime_types"],
+        "districts": summary["districts"],
+        "features": summary["features"],
+        "groups": {int(group): count for group, count in summary["groups"].items()},
+    }
@@ -0,0 +1,215 @@
+# Lightweight timing spans for the dashboard's reruns.
+#
+# Enabled with CRIME_DASHBOARD_TRACE=1. Every rerun is recorded per page, with
+# named stages inside it: import (first import of the page module), data
+# (loaders), build (figure cache lookup plus the figure build on a miss),
+# aggregate (the pandas work inside a build) and render (chart serialization).
+# Spans are appended to <trace dir>/spans.jsonl, and a Prometheus text file
+# with rerun counts, p50/p95/p99 per page and stage and cache hit ratios is
+# rewritten to <trace dir>/metrics.prom every few seconds. When tracing is
+# disabled, span() returns a shared no-op context manager, so the app pays
+# one attribute check per span.
+#
+#   python -m crime_dashboard.tracing .cache/trace/spans.jsonl    # percentile summary
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from crime_dashboard import storage
+
+ENABLED = os.environ.get("CRIME_DASHBOARD_TRACE", "").lower() not in ("", "0", "false", "no")
+TRACE_DIR = os.environ.get("CRIME_DASHBOARD_TRACE_DIR", os.path.join(storage.CACHE_DIR, "trace"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "start")
+
+    def __init__(self, tracer, stage):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _Rerun:
+    def __init__(self, tracer, page, fragment):
+        self.tracer = tracer
+        self.page = page
+        self.fragment = fragment
+
+    def __enter__(self):
+        local = self.tracer._local
+        # A fragment running inside a full rerun is part of that rerun
+        self.nested = getattr(local, "page", None) is not None
+        if not self.nested:
+            local.page, local.spans = self.page, []
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.nested:
+            self.tracer.record("total", time.perf_counter() - self.start)
+            self.tracer.finish_rerun(self.fragment)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled=ENABLED, trace_dir=TRACE_DIR, window=1000, metrics_interval=5.0):
+        self.enabled = enabled
+        self.trace_dir = trace_dir
+        self.window = window
+        self.metrics_interval = metrics_interval
+        self.reruns = Counter()
+        # (page, stage) -> the last `window` durations in seconds
+        self.durations = {}
+        # cache name -> callable returning FigureCache.stats()-like dicts
+        self.caches = {}
+        self._metrics_written = 0.0
+        self._lock = threading.Lock()
+        # Page and spans of the rerun running on this thread (one per session)
+        self._local = threading.local()
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def rerun(self, page, fragment=False):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Rerun(self, page, fragment)
+
+    def record(self, stage, seconds):
+        page = getattr(self._local, "page", None) or "-"
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append((stage, seconds))
+        with self._lock:
+            key = (page, stage)
+            if key not in self.durations:
+                self.durations[key] = deque(maxlen=self.window)
+            self.durations[key].append(seconds)
+
+    def finish_rerun(self, fragment=False):
+        local = self._local
+        record = {"time": time.time(), "page": local.page, "fragment": fragment,
+                  "spans": [{"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in local.spans]}
+        local.last, local.page, local.spans = record, None, None
+        with self._lock:
+            self.reruns[record["page"]] += 1
+            write_metrics = time.monotonic() - self._metrics_written >= self.metrics_interval
+            if write_metrics:
+                self._metrics_written = time.monotonic()
+
+        if self.trace_dir:
+            try:
+                self.export(record, write_metrics)
+            except OSError:
+                # Tracing must never break the page
+                pass
+
+    def last_rerun(self):
+        # Spans of the previous finished rerun on this thread (debug overlay)
+        return getattr(self._local, "last", None)
+
+    def register_cache(self, name, stats):
+        self.caches[name] = stats
+
+    def percentiles(self):
+        with self._lock:
+            samples = {key: list(values) for key, values in self.durations.items()}
+        return {key: summarize(values) for key, values in samples.items()}
+
+    def prometheus_text(self):
+        lines = ["# TYPE crime_dashboard_reruns_total counter"]
+        with self._lock:
+            reruns = dict(self.reruns)
+        for page, count in sorted(reruns.items()):
+            lines.append(f'crime_dashboard_reruns_total{{page="{page}"}} {count}')
+
+        lines.append("# TYPE crime_dashboard_stage_seconds summary")
+        for (page, stage), summary in sorted(self.percentiles().items()):
+            labels = f'page="{page}",stage="{stage}"'
+            for quantile in QUANTILES:
+                value = summary[f"p{int(quantile * 100)}"]
+                lines.append(f'crime_dashboard_stage_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f"crime_dashboard_stage_seconds_count{{{labels}}} {summary['count']}")
+
+        lines.append("# TYPE crime_dashboard_cache_hit_ratio gauge")
+        for name, stats in sorted(self.caches.items()):
+            lines.append(f'crime_dashboard_cache_hit_ratio{{cache="{name}"}} {stats()["hit_ratio"]:.4f}')
+        # Misses that waited for an identical build already running
+        lines.append("# TYPE crime_dashboard_cache_coalesced_total counter")
+        for name, stats in sorted(self.caches.items()):
+            lines.append(f'crime_dashboard_cache_coalesced_total{{cache="{name}"}} {stats().get("coalesced", 0)}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, record, write_metrics):
+        os.makedirs(self.trace_dir, exist_ok=True)
+        with open(os.path.join(self.trace_dir, "spans.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if write_metrics:
+            path = os.path.join(self.trace_dir, "metrics.prom")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(path + ".tmp", path)
+
+
+def summarize(seconds):
+    values = np.percentile(seconds, [quantile * 100 for quantile in QUANTILES])
+    summary = {f"p{int(quantile * 100)}": value for quantile, value in zip(QUANTILES, values)}
+    summary["count"] = len(seconds)
+    return summary
+
+
+# Shared by every session of the app
+tracer = Tracer()
+
+
+def span(stage):
+    return tracer.span(stage)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the spans written by the dashboard")
+    parser.add_argument("spans", nargs="?", default=os.path.join(TRACE_DIR, "spans.jsonl"))
+    args = parser.parse_args()
+
+    samples, reruns = {}, Counter()
+    with open(args.spans, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            reruns[record["page"]] += 1
+            for item in record["spans"]:
+                samples.setdefault((record["page"], item["stage"]), []).append(item["ms"] / 1000)
+
+    print(f"{'page':32} {'stage':10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for (page, stage), seconds in sorted(samples.items()):
+        summary = summarize(seconds)
+        print(f"{page:32} {stage:10} {summary['count']:6d} {summary['p50'] * 1000:9.1f} "
+              f"{summary['p95'] * 1000:9.1f} {summary['p99'] * 1000:9.1f}")
+    print("reruns: " + ", ".join(f"{page} {count}" for page, count in sorted(reruns.items())))
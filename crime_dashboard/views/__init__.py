@@ -0,0 +1,30 @@
+# Page registry. Each dashboard page is a module in this package with a
+# render(version) function, imported the first time someone opens the page,
+# so starting the app (and showing the Overview) never imports Plotly.
+# `python -m crime_dashboard.startup` measures the imports against a budget.
+import importlib
+import sys
+import time
+
+# Sidebar label -> page module, in sidebar order
+PAGES = {
+    "Overview": "crime_dashboard.views.overview",
+    "Crime Statistics": "crime_dashboard.views.crime_statistics",
+    "Education & Crime Analysis": "crime_dashboard.views.education_crime",
+    "Socio-Economic Impact": "crime_dashboard.views.socio_economic",
+    "Integrated Data Visuals": "crime_dashboard.views.integrated",
+    "Correlation Analysis": "crime_dashboard.views.correlations",
+}
+
+# Page -> seconds its first import took in this process
+import_times = {}
+
+
+def load_page(page):
+    module_name = PAGES[page]
+    module = sys.modules.get(module_name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        import_times[page] = time.perf_counter() - start
+    return module
@@ -0,0 +1,173 @@
+# Loaders and helpers shared by the page modules. Kept free of Plotly so
+# importing it (and the Overview page) stays cheap.
+import functools
+import logging
+import types
+import weakref
+
+import streamlit as st
+
+from crime_dashboard import backends, hotswap, prerender, shared, storage, summary, tracing
+from crime_dashboard.cube import AggregateCube
+from crime_dashboard.dataset import Dataset
+from crime_dashboard.figure_cache import FigureCache, figure_key
+from crime_dashboard.joins import SettlementIndex
+
+
+# Load the datasets (parsed once into typed columns, see crime_dashboard/data.py).
+# Reads the Feather cache when one was built (crime_dashboard/storage.py); the
+# data version argument makes a changed source file reload on the next rerun.
+# One read-only Dataset is shared by all sessions instead of a copy per rerun.
+# In shared mode (crime_dashboard/shared.py) the frames are memory maps of the
+# arrays published for this host, shared by all worker processes
+@st.cache_resource(max_entries=2)
+def load_data(version):
+    education_df, crimes, partitions, attached = shared.load(version)
+    dataset = Dataset.from_frames(education_df, crimes, version, partitions, copy=not attached)
+    _datasets[version] = dataset
+    return dataset
+
+
+# Data version -> its Dataset, while load_data's cache holds it
+_datasets = weakref.WeakValueDictionary()
+
+
+# The most recently built cube and the partitions it was built from
+_latest_cube = {}
+
+
+# Build the aggregate cube once per data version, shared by all sessions.
+# When the new version only added or replaced crime years (see
+# storage.append_partitions), the previous cube is updated for those years
+@st.cache_resource(max_entries=2)
+def load_cube(version):
+    dataset = load_data(version)
+    previous = _latest_cube.get("cube")
+    years = storage.changed_partitions(_latest_cube.get("partitions"), dataset.partitions)
+    if previous is not None and years:
+        cube = previous.updated(dataset.crimes, years)
+    else:
+        cube = AggregateCube(dataset.crimes, dataset.education)
+    _latest_cube.update(cube=cube, partitions=dataset.partitions)
+    return cube
+
+
+# Settlement join index between the two datasets, shared by all sessions
+@st.cache_resource(max_entries=2)
+def load_settlement_index(version):
+    dataset = load_data(version)
+    return SettlementIndex(dataset.crimes, dataset.education)
+
+
+# The query backend the pages read from (crime_dashboard/backends.py): the
+# in-memory cube and settlement index, or DuckDB over the partitioned cache
+# with CRIME_DASHBOARD_BACKEND=duckdb. Shared by all sessions
+@st.cache_resource(max_entries=2)
+def load_backend(version):
+    if backends.BACKEND == "duckdb":
+        return backends.DuckDBBackend(version)
+    if backends.BACKEND != "pandas":
+        raise ValueError(f"unknown backend {backends.BACKEND!r}; expected one of: {', '.join(backends.BACKENDS)}")
+    dataset = load_data(version)
+    return backends.PandasBackend(load_cube(version), load_settlement_index(version), dataset.education,
+                                  dataset.crimes)
+
+
+# Fail loudly if a page modified the shared (read-only) dataset; only the
+# pandas backend holds one, and only once a page has loaded it (the Overview
+# does not)
+def verify_data(version):
+    dataset = _datasets.get(version)
+    if backends.BACKEND == "pandas" and dataset is not None:
+        dataset.verify()
+
+
+# The Overview numbers and widget options (crime_dashboard/summary.py) of
+# this data version: from the published meta.json in shared mode, else from
+# the version's cache manifest, so neither the Overview nor a page whose view
+# is prerendered or cached waits for the datasets. Without either (no cache
+# yet, or a version no longer kept) they come from the loaded data
+@st.cache_resource(max_entries=2)
+def load_summary(version):
+    numbers = summary.parse(shared.published_summary(version)) if shared.ENABLED else None
+    if numbers is None:
+        numbers = summary.parse(storage.read_summary(version=version))
+    if numbers is None:
+        with tracing.span("data"):
+            numbers = summary.parse(summary.from_backend(load_backend(version)))
+    return numbers
+
+
+# The pages' widget options: crime types and districts in order of first
+# appearance, and the years
+def load_labels(version):
+    numbers = load_summary(version)
+    return types.SimpleNamespace(crime_types=numbers["crime_types"], districts=numbers["districts"],
+                                 years=list(numbers["years"]))
+
+
+# The data version reruns read (see crime_dashboard/hotswap.py). A background
+# thread loads a new version through the loaders above before reruns switch
+# to it, so no rerun waits for the data or the aggregates to be built. The
+# first version is loaded by the first page that needs it, not by the Overview.
+# The thread calls the loaders outside any script run, which Streamlit would
+# log as a "missing ScriptRunContext" warning on every reload
+@st.cache_resource
+def get_reloader():
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: record.threadName != hotswap.THREAD_NAME)
+    return hotswap.Reloader(shared.data_version, load_backend, build_first=False)
+
+
+def data_version():
+    return get_reloader().current()[0]
+
+
+# Built figures keyed by (page, data version, selections), shared by all sessions
+@st.cache_resource
+def get_figure_cache():
+    cache = FigureCache(max_entries=256)
+    tracing.tracer.register_cache("figures", cache.stats)
+    return cache
+
+
+# Views of the prerendered bundle (python -m crime_dashboard.prerender) built
+# for this data version; the stamp picks up a bundle written while the app runs
+@st.cache_resource(max_entries=2)
+def load_bundle(version, stamp):
+    return prerender.read_bundle(version)
+
+
+# A page's figure(s) for the given selections: from the figure cache, else
+# from the prerendered bundle, else built with build()
+def get_figure(page, version, build, **selections):
+    key = figure_key(page, version, **selections)
+
+    def load_or_build():
+        figure = prerender.load_figure(load_bundle(version, prerender.bundle_stamp()), key)
+        return build() if figure is None else figure
+
+    return get_figure_cache().get_or_build(key, load_or_build)
+
+
+# Each page's controls and chart rerun on their own when one of its widgets
+# changes (st.fragment; older Streamlit releases only have experimental_fragment)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def page_fragment(page):
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args):
+            # A fragment rerun is traced as a rerun of its page
+            with tracing.tracer.rerun(page, fragment=True):
+                func(*args)
+        return fragment(run) if fragment else run
+    return decorate
+
+
+# Add a custom visual break to separate sections
+def add_divider():
+    st.markdown("""
+        <hr style="border:1px solid #e8e8e8; margin-top:20px; margin-bottom:20px;">
+    """, unsafe_allow_html=True)
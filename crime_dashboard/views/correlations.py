@@ -0,0 +1,83 @@
+# "Correlation Analysis": correlation of every education metric with every
+# crime type across settlements, with bootstrap confidence intervals.
+import streamlit as st
+
+from crime_dashboard import charts, correlation, tracing
+from crime_dashboard.views.common import data_version, get_figure, load_backend, load_labels, page_fragment
+
+PAGE = "Correlation Analysis"
+
+# Bootstrap resamples the slider offers (0: no confidence intervals)
+RESAMPLE_OPTIONS = [0, 200, 1000, 2000]
+
+
+def render(version):
+    st.markdown("""
+            ### Which education indicators move together with which types of crime, and how sure can we be?
+
+
+            ##### Plot Overview:
+            This heatmap shows the correlation between each education metric and each crime type, computed across Israeli settlements. 
+            Blue cells mean that settlements with a higher education rate tend to have a higher crime rate, red cells a lower one. A star marks the pairs whose bootstrap confidence interval does not include zero.
+
+            ##### How to use?
+            Select Year and District: Choose the settlements to compare (all years together pools every settlement-year).                                                   
+            Select Method: Pearson measures a linear relationship, Spearman a monotonic one (based on ranks).                                                   
+            Weight by population: Larger settlements count more.                                                                                                     
+            Hover over a cell to see the confidence interval and the number of settlements behind it.
+        """)
+
+    # Only the widget options here: the data is loaded when a figure has to
+    # be built (not for a cached or prerendered view)
+    with tracing.span("data"):
+        labels = load_labels(version)
+
+    matala5(labels)
+
+
+@page_fragment(PAGE)
+def matala5(labels):
+    # A fragment rerun reuses the arguments of the last full run, so the
+    # data version is read here: after a hot swap it builds for the new one
+    version = data_version()
+
+    st.markdown("""
+            <style>
+                .custom-title {
+                    font-size: 30px;
+                    font-weight: bold;
+                }
+            </style>
+            <div class="custom-title">
+                Correlation of Education Metrics and Crime Rates across Settlements
+            </div>
+        """, unsafe_allow_html=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        year = st.selectbox("Select Year:", options=["All years"] + labels.years, index=len(labels.years))
+    with col2:
+        district = st.selectbox("Select District:", options=["All districts"] + labels.districts)
+    with col3:
+        method = st.radio("Select Method:", list(correlation.METHODS), horizontal=True, format_func=str.title)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        weighted = st.checkbox("Weight by population", value=False)
+    with col2:
+        resamples = st.select_slider("Bootstrap resamples:", options=RESAMPLE_OPTIONS, value=1000)
+
+    years = labels.years if year == "All years" else [year]
+    district = None if district == "All districts" else district
+
+    def build():
+        with tracing.span("aggregate"):
+            table = correlation.correlations(load_backend(version), years, district, method, weighted, resamples)
+        return charts.correlation_figure(table, method)
+
+    with tracing.span("build"):
+        fig = get_figure(PAGE, version, build, years=years, district=district, method=method, weighted=weighted,
+                         resamples=resamples)
+
+    with tracing.span("render"):
+        st.plotly_chart(fig, use_container_width=True)
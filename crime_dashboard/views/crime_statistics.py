@@ -0,0 +1,99 @@
+# "Crime Statistics": crime rate by year per district, with the average
+# rate per district next to it.
+import streamlit as st
+
+from crime_dashboard import charts, tracing
+from crime_dashboard.segments import WEIGHTING_LABELS, WEIGHTINGS
+from crime_dashboard.views.common import data_version, get_figure, load_backend, load_labels, page_fragment
+
+PAGE = "Crime Statistics"
+
+# Districts selected when the page opens
+DEFAULT_DISTRICTS = ["North", "Center", "South", "Jerusalem", "Tel Aviv", "Haifa"]
+
+
+def render(version):
+    st.markdown("""
+            ### What is the level of crime in different districts in Israel and the average crime rate in each district over the last 5 years?
+            
+            
+            ##### Plot Overview:
+            This plot displays crime rates across different Israeli districts over the years. The line graph on the right tracks crime trends by district and type, with the y-axis representing crime rates and the x-axis showing the years. 
+            The mini-bar chart on the left highlights the average crime rate for each district in recent years, enabling easy comparisons between districts.
+
+            ##### How to use?                                                     
+            Select Crime Type: Choose the specific type of crime you wish to focus on.                                                                                                             
+            Select Districts: Choose the districts you're interested in analyzing.                                                                              
+            District Rate: Average the settlements' rates, or weight every settlement by its population (crimes per resident of the whole district).                  
+            Hover over the line/bar to see district names and their corresponding crime percentage.                                                                                                    
+        """)
+
+    # Only the widget options here: the data is loaded when a figure has to
+    # be built (not for a cached or prerendered view)
+    with tracing.span("data"):
+        labels = load_labels(version)
+
+    matala1(labels)
+
+
+@page_fragment(PAGE)
+def matala1(labels):
+    # A fragment rerun reuses the arguments of the last full run, so the
+    # data version is read here: after a hot swap it builds for the new one
+    version = data_version()
+
+    st.markdown("""
+                <style>
+                    .custom-title {
+                        font-size: 30px;  /* Font size */
+                        font-weight: bold;  /* Font weight */
+                    }
+                </style>
+                <div class="custom-title">
+                    Crime Rate by Year for Different Districts
+                </div>
+            """, unsafe_allow_html=True)
+
+    # District x year rates come from the query backend (the aggregate cube by default)
+    crime_types = labels.crime_types
+    unique_districts = labels.districts
+
+    with st.container():
+        filter_col1, filter_col2 = st.columns([1, 2])
+
+        with filter_col1:
+            crime_type = st.selectbox(
+                "Select Type of Crime:",
+                options=crime_types,
+                index=crime_types.index("All Crimes")
+            )
+
+        with filter_col2:
+            districts = st.multiselect(
+                "Select Districts:",
+                options=unique_districts,
+                default=DEFAULT_DISTRICTS,
+                key="district_filter"
+            )
+
+        # How settlements are rolled up into a district rate (see segments.py)
+        weighting = st.radio("District rate:", list(WEIGHTINGS), horizontal=True, format_func=WEIGHTING_LABELS.get,
+                             key="crime_statistics_weighting")
+
+    with tracing.span("build"):
+        fig_mini, fig = get_figure(PAGE, version,
+                                   lambda: charts.crime_statistics_figures(load_backend(version), crime_type,
+                                                                           districts, weighting),
+                                   crime_type=crime_type, districts=districts, weighting=weighting)
+
+    with st.container(), tracing.span("render"):
+        col1, col2 = st.columns([1, 3])
+
+        with col1:
+            st.plotly_chart(fig_mini, use_container_width=True)
+
+        with col2:
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.warning("No data available for the selected filters.")
@@ -0,0 +1,80 @@
+# "Education & Crime Analysis": 2023 crime rate and an education metric per
+# district, side by side.
+import streamlit as st
+
+from crime_dashboard import charts, tracing
+from crime_dashboard.segments import WEIGHTING_LABELS, WEIGHTINGS
+from crime_dashboard.data import education_translation, statistic_group_translation
+from crime_dashboard.views.common import data_version, get_figure, load_backend, page_fragment
+
+PAGE = "Education & Crime Analysis"
+
+
+def render(version):
+    st.markdown("""
+            ### What patterns and correlations can be uncovered between education indicators and crime rates across Israeli districts?
+
+
+            ##### Plot Overview:
+            This plot compares crime and education rates across Israeli districts, displaying two sets of bars: one for crime rates and one for education metrics. 
+            It enables a clear comparison of how crime levels relate to education statistics in each district.
+                    
+            ##### How to use?
+            Select Crime Type: Choose the specific type of crime you want to focus on.                                                                                    
+            Select Districts: Choose the education indicator you'd like to explore. 
+            District Crime Rate: Average the settlements' rates, or weight every settlement by its population.
+        """)
+
+    # The options are constants; the data is loaded when a figure has to be
+    # built (not for a cached or prerendered view)
+    matala2()
+
+
+@page_fragment(PAGE)
+def matala2():
+    # A fragment rerun reuses the arguments of the last full run, so the
+    # data version is read here: after a hot swap it builds for the new one
+    version = data_version()
+
+    # Custom title
+    st.markdown("""
+                <style>
+                    .custom-title {
+                        font-size: 30px;  /* Font size */
+                        font-weight: bold;  /* Font weight */
+                    }
+                </style>
+                <div class="custom-title">
+                    Crime Rate vs Education Rate in Different Districts
+                </div>
+            """, unsafe_allow_html=True)
+
+    # Default values
+    default_crime = "All Crimes"
+    default_rate = '5UnitsMathematicsRate'
+
+    # Crime type selection
+    crime_options = list(statistic_group_translation.values())
+    default_crime_index = crime_options.index(default_crime)
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_crime = st.selectbox("Select Type of Crime", crime_options, index=default_crime_index)
+    with col2:
+        selected_rate = st.selectbox("Select Education Metric", list(education_translation.values()), index=3)
+    # How settlements are rolled up into a district crime rate (see segments.py)
+    weighting = st.radio("District crime rate:", list(WEIGHTINGS), horizontal=True, format_func=WEIGHTING_LABELS.get,
+                         key="education_crime_weighting")
+
+    # Reverse mapping
+    reverse_rate_mapping = {v: k for k, v in education_translation.items()}
+    selected_rate_column = reverse_rate_mapping.get(selected_rate, default_rate)
+
+    with tracing.span("build"):
+        fig = get_figure(PAGE, version,
+                         lambda: charts.education_crime_figure(load_backend(version), selected_crime,
+                                                               selected_rate_column, weighting),
+                         crime_type=selected_crime, rate=selected_rate_column, weighting=weighting)
+
+    # Display the plot
+    with tracing.span("render"):
+        st.plotly_chart(fig)
@@ -0,0 +1,115 @@
+# "Integrated Data Visuals": settlements by crime rate and an education rate,
+# colored by socio-economic group.
+import streamlit as st
+
+from crime_dashboard import charts, tracing
+from crime_dashboard.aggregates import default_year
+from crime_dashboard.data import education_translation, statistic_group_translation
+from crime_dashboard.views.common import data_version, get_figure, load_backend, load_labels, page_fragment
+
+PAGE = "Integrated Data Visuals"
+
+# Scatter views with more settlements than this are thinned on the server
+MAX_SCATTER_POINTS = 5000
+
+
+def render(version):
+    st.markdown("""
+            ### What are the differences between localities in Israel in the relationship between education levels, socioeconomic status, and crime rates?
+
+
+            ##### Plot Overview:
+            This scatter plot shows the relationship between crime rates and education rates across Israeli settlements, with socio-economic groups color-coded. 
+            Each settlement is represented by a circle, where the position reflects the crime rate and selected education indicator, allowing for easy exploration of their correlation.
+
+            ##### How to use?
+            Select Crime Type: Choose the specific type of crime to focus on.                                                                                                         
+            Select Education Rate: Choose an education metric to analyze its correlation with crime rates.                                                                                      
+            Hover Over Points: Hover over each settlement to view details like its name, crime rate, and the selected education rate.                                    
+        """)
+
+    # Only the widget options here: the data is loaded when a figure has to
+    # be built (not for a cached or prerendered view)
+    with tracing.span("data"):
+        labels = load_labels(version)
+
+    matala4(labels)
+
+
+@page_fragment(PAGE)
+def matala4(labels):
+    # A fragment rerun reuses the arguments of the last full run, so the
+    # data version is read here: after a hot swap it builds for the new one
+    version = data_version()
+
+    st.markdown("""
+            <style>
+                /* Adjust width of selectboxes */
+                .stSelectbox select {
+                    width: 200px;  /* Set the width of the selectbox */
+                }
+                /* Title customization */
+                .custom-title {
+                    font-size: 30px;
+                    font-weight: bold;
+                }
+            </style>
+        """, unsafe_allow_html=True)
+
+    st.markdown("""
+            <div class="custom-title">
+                Distribution of Settlements Based on Crime and Education Rate, with Socio-Economic Grouping
+            </div>
+        """, unsafe_allow_html=True)
+
+    # Reverse the rate mapping to get the column names
+    reverse_rate_mapping = {v: k for k, v in education_translation.items()}
+
+    # Default selected rate
+    default_rate = 'EligibleForBagrutRate'
+
+    # Default crime type
+    default_crime_type = statistic_group_translation["כל העבירות"]
+
+    crime_types = labels.crime_types
+
+    # Add filters in one line using st.columns
+    col1, col2 = st.columns(2)
+
+    with col1:
+        rate_filter = st.selectbox(
+            "Select Education Rate:",
+            options=list(education_translation.values()),
+            index=list(education_translation.values()).index(education_translation[default_rate])
+        )
+
+    with col2:
+        crime_type_filter = st.multiselect(
+            "Select Crime Types:",
+            options=crime_types,
+            default=[default_crime_type]
+        )
+
+    # Years to plot and how to draw dense views (all years and crime types
+    # at once is tens of thousands of points at full scale)
+    with st.expander("More years and rendering options"):
+        years = st.multiselect("Select Years:", options=labels.years, default=[default_year(labels.years)])
+        render_mode = st.radio("Rendering:", ["auto", "svg", "webgl"], horizontal=True,
+                               format_func=lambda mode: {"auto": "Automatic", "svg": "SVG", "webgl": "WebGL"}[mode])
+        thin_points = st.checkbox(f"Thin out dense views to at most {MAX_SCATTER_POINTS} points (outliers first)",
+                                  value=True)
+
+    # Get the corresponding field name for the selected rate
+    selected_rate = reverse_rate_mapping.get(rate_filter, default_rate)
+    max_points = MAX_SCATTER_POINTS if thin_points else None
+
+    with tracing.span("build"):
+        fig4 = get_figure(PAGE, version,
+                          lambda: charts.integrated_figure(load_backend(version), selected_rate, crime_type_filter,
+                                                           years, render_mode, max_points),
+                          rate=selected_rate, crime_types=crime_type_filter, years=years, render_mode=render_mode,
+                          max_points=max_points)
+
+    # Display the chart
+    with tracing.span("render"):
+        st.plotly_chart(fig4)
@@ -0,0 +1,185 @@
+# "Overview": what the two datasets contain, with yearly crime totals and
+# the range of each education rate. Text and a few numbers only, so this
+# page never imports Plotly; the numbers come from the summary written with
+# the data (crime_dashboard/summary.py), so it does not load the datasets
+# either.
+import streamlit as st
+
+from crime_dashboard import tracing
+from crime_dashboard.data import education_translation
+from crime_dashboard.views.common import add_divider, load_summary
+
+PAGE = "Overview"
+
+# Year columns per row in "Crime Statistics Over the Years"
+YEARS_PER_ROW = 6
+
+
+def render(version):
+    with tracing.span("summary"):
+        numbers = load_summary(version)
+        year_counts = numbers["years"]
+
+    st.title("The Impact of Educational and Socioeconomic Factors on Crime Patterns in Israel")
+
+    first_year, last_year = min(year_counts), max(year_counts)
+    st.markdown(f"""
+        This dashboard analyzes the connections between crime rates and education and socioeconomic factors across Israel. By examining data from both crime and education sectors, it aims to uncover trends and correlations that help explain crime patterns in various settlements.
+
+        ### Data Overview
+
+        ##### Crime Data:
+        The crime dataset covers criminal activity from {first_year} to {last_year}, detailing crime types, district data, and demographic information for Israeli settlements.            """)
+    # Add divider after title for visual separation
+    add_divider()
+    with tracing.span("render"):
+        render_overview_crime(year_counts)
+    add_divider()
+
+
+    st.markdown("""
+        &nbsp;
+        ##### Education Data:
+        The education dataset provides information on the educational performance and socio-economic status of Israeli settlements for 2023.
+        """)
+    add_divider()
+    with tracing.span("render"):
+        render_min_max_general_rates(numbers["features"])
+    add_divider()
+
+    st.markdown("""
+        &nbsp;
+        \n\n
+        By combining these two data sources, the dashboard provides insights into the links between education, crime, and socio-economic factors in Israel. It allows users to explore trends and patterns, offering a clearer understanding of the complex relationship between education and crime.        """)
+
+
+def render_overview_crime(year_counts):
+    # year_counts: year -> crimes (the StatisticGroupKod == -2 rows, see
+    # summary.py)
+
+    # Define custom HTML and CSS styles
+    st.markdown("""
+        <style>
+            .year-style {
+                font-size: 21px;
+                font-weight: bold;
+                text-align: center;
+                padding-left: 1px;  /* Adjust padding-left to move the year slightly to the right */
+            }
+            .count-style {
+                font-size: 17px;
+                font-weight: bold;
+                text-align: center;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Directly define the title using inline CSS to ensure it's applied
+    st.markdown("""
+        <h3 style="font-size: 18px; font-weight: bold; text-align: center; margin-bottom: 20px; font-family: 'Roboto', sans-serif;">
+            Crime Statistics Over the Years
+        </h3>
+    """, unsafe_allow_html=True)
+
+    # One column per year, in rows of up to YEARS_PER_ROW (the number of
+    # years grows as new years are appended)
+    years = list(year_counts.items())
+    for start in range(0, len(years), YEARS_PER_ROW):
+        row = years[start:start + YEARS_PER_ROW]
+        for col, (year, count) in zip(st.columns(len(row)), row):
+            year_str = int(year)
+            count_str = int(count)
+            col.markdown(
+                f"<div class='year-style'>{year_str}</div><div class='count-style'>{count_str} Crimes</div>",
+                unsafe_allow_html=True)
+
+
+def render_overview_education(socioecon_group_counts):
+    # socioecon_group_counts: SocioeconomicGroup -> number of unique
+    # settlements (the summary's "groups")
+
+    st.markdown("""
+        <style>
+            .group-style {
+                font-size: 18px;
+                font-weight: bold;
+                text-align: center;
+            }
+            .count-style {
+                font-size: 16px;
+                font-weight: bold;
+                text-align: center;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Define the title using inline styles
+    st.markdown(
+        '<h3 style="font-size: 17px; font-weight: bold; text-align: center; margin-bottom: 20px; font-family: \'Roboto\', sans-serif;">Number of Settlements by Socioeconomic Group</h3>',
+        unsafe_allow_html=True)
+
+    # Create columns for each group count (up to 9 groups)
+    cols = st.columns(9)
+
+    # Populate the columns with SocioeconomicGroup and settlement count data for groups 1-9
+    for i, group in enumerate(range(1, 10)):
+        count = socioecon_group_counts.get(group, 0)  # Get the count for the group, default to 0 if not present
+        group_str = str(group)
+        count_str = int(count)
+
+        # Use the appropriate column for each group
+        cols[i].markdown(
+            f"<div class='group-style'>{group_str}</div>"
+            f"<div class='count-style'>{count_str} Settlements</div>",
+            unsafe_allow_html=True)
+
+
+def render_min_max_general_rates(min_max_avg_stats):
+    # min_max_avg_stats: feature -> its min, max and mean (the summary's
+    # "features")
+    features = list(education_translation.keys())
+
+    st.markdown("""
+        <style>
+            .feature-style {
+                font-size: 16px; /* Adjust font size */
+                text-align: center;
+                margin-bottom: 5px;
+                font-family: 'Arial', sans-serif; /* Change font family */
+                font-weight: bold; /* Make text bold */
+            }
+            .rate-style {
+                font-size: 14px; /* Adjust font size for rates */
+                text-align: center;
+                margin-top: 5px;
+                font-family: 'Arial', monospace; /* Change font family for rates */
+                font-weight: bold; /* Optional: Make text normal weight */
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Define the title using inline styles
+    st.markdown(
+        '<h3 style="font-size: 18px; font-weight: bold; text-align: center; margin-bottom: 20px; font-family: \'Roboto\', sans-serif;">Min, Max, and Average Rates for Education Features</h3>',
+        unsafe_allow_html=True)
+
+    # Create columns to display results
+    cols = st.columns(len(features))
+
+    for i, feature in enumerate(features):
+        # Get the translated name
+        translated_feature = education_translation[feature]
+
+        # Min, max, and average values, in percent
+        min_value = min_max_avg_stats[feature]['min'] * 100
+        max_value = min_max_avg_stats[feature]['max'] * 100
+        avg_value = min_max_avg_stats[feature]['mean'] * 100
+
+        # Display each feature's min, max, and average in its own column
+        cols[i].markdown(
+            f"<div class='feature-style'>{translated_feature}</div>"
+            f"<div class='rate-style'>Min: {min_value:.1f}%</div>"
+            f"<div class='rate-style'>Max: {max_value:.1f}%</div>"
+            f"<div class='rate-style'>Avg: {avg_value:.1f}%</div>",
+            unsafe_allow_html=True
+        )
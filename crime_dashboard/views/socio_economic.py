@@ -0,0 +1,99 @@
+# "Socio-Economic Impact": distribution of the 2023 settlement crime rates per
+# socio-economic group.
+import streamlit as st
+
+from crime_dashboard import charts, tracing
+from crime_dashboard.data import statistic_group_translation
+from crime_dashboard.views.common import data_version, get_figure, load_backend, load_labels, page_fragment
+
+PAGE = "Socio-Economic Impact"
+
+
+def render(version):
+    st.markdown("""
+            ### How does socio-economic status influence crime levels across different districts in Israel?
+
+
+            ##### Plot Overview:
+            This plot displays the distribution of crime rates across socio-economic groups in Israeli settlements. 
+            The box plot shows the spread and outliers of crime rates within each group, with crime rates on the y-axis and socio-economic groups (1 to 9) on the x-axis for easy comparison.
+
+            ##### How to use?                
+            Select Crime Type: Choose the specific type of crime you want to analyze.                                                                               
+            Hover over a point to see the socio-economic group number and its corresponding crime percentage.                                                                        
+            In full screen of the plot, hover over the box to view details like the minimum and maximum values for each socio-economic group.
+        """)
+
+    # Only the widget options here: the data is loaded when a figure has to
+    # be built (not for a cached or prerendered view)
+    with tracing.span("data"):
+        labels = load_labels(version)
+
+    matala3(labels)
+
+
+@page_fragment(PAGE)
+def matala3(labels):
+    # A fragment rerun reuses the arguments of the last full run, so the
+    # data version is read here: after a hot swap it builds for the new one
+    version = data_version()
+
+    # Custom CSS to move the selectbox more precisely and ensure centering
+    st.markdown("""
+        <style>
+            /* Target the outer container of the selectbox widget to move it */
+            div[role="listbox"] {
+                position: relative !important;
+                left: 0 !important;  /* Keep the selectbox in center */
+                transform: translateX(-50%) !important;  /* Move the selectbox horizontally to center */
+                width: auto !important;  /* Let the width auto-adjust */
+            }
+            .css-1d391kg {  /* Adjust the spacing of the main container */
+                padding: 0 1rem;  /* Adjust top and side padding */
+            }
+            .css-18e3th9 {  /* Adjust the spacing of the sidebar (filters) */
+                padding: 0 0 0px 0;  /* Top, right, bottom, left */
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Title
+    st.markdown("""
+        <style>
+            .custom-title {
+                font-size: 30px;  /* Font size */
+                font-weight: bold;  /* Font weight */
+            }
+        </style>
+        <div class="custom-title">
+            Distribution of Crime Percentage by Socio-Economic Group
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Define available crime types (English labels)
+    crime_types = labels.crime_types
+    default_crime_type = statistic_group_translation["כל העבירות"]  # "All Crimes" in Hebrew
+
+    # Create a column layout with equal width
+    col1, col2, col3 = st.columns([1, 1, 1])  # Adjust the numbers to control the proportions
+
+    with col2:
+        # Add a filter for crime type
+        crime_type_filter = st.selectbox(
+            "Select Crime Type:",
+            options=crime_types,
+            index=crime_types.index(default_crime_type)
+        )
+        # Every settlement as a point is opt-in; by default the boxes come
+        # from precomputed statistics and only the outliers are drawn
+        show_all_points = st.checkbox("Show all settlements", value=False)
+
+    with tracing.span("build"):
+        fig = get_figure(PAGE, version,
+                         lambda: charts.socio_economic_figure(load_backend(version), crime_type_filter,
+                                                              show_all_points),
+                         crime_type=crime_type_filter, all_points=show_all_points)
+
+    # Display the chart
+    with tracing.span("render"):
+        st.plotly_chart(fig)
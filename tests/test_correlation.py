@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from crime_dashboard.correlation import correlate, spearman
+
+
+def matrices(rows=60, seed=0):
+    # Three metrics and four crime types, with missing values in different
+    # settlements per column (and ties)
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(rows, 3))
+    y = x[:, [0, 1, 2, 0]] + rng.normal(size=(rows, 4))
+    x[:, 1] = np.round(x[:, 1])
+    for column, missing in [(0, 5), (2, 12)]:
+        x[rng.choice(rows, missing, replace=False), column] = np.nan
+    for column, missing in [(1, 8), (2, 20), (3, 3)]:
+        y[rng.choice(rows, missing, replace=False), column] = np.nan
+    return x, y
+
+
+def pandas_spearman(x, y):
+    # Pearson r of the ranks over the rows both columns have
+    def r(x_column, y_column):
+        pair = pd.DataFrame({"x": x_column, "y": y_column}).dropna()
+        return pair["x"].rank().corr(pair["y"].rank())
+    return np.array([[r(x[:, i], y[:, j]) for j in range(y.shape[1])] for i in range(x.shape[1])])
+
+
+def test_spearman_ranks_each_pair_over_its_shared_rows():
+    x, y = matrices()
+    r, _, _, pairs = correlate(x, y, method="spearman")
+    np.testing.assert_allclose(r, pandas_spearman(x, y), atol=1e-12)
+    assert pairs[2, 2] == np.sum(~np.isnan(x[:, 2]) & ~np.isnan(y[:, 2]))
+
+
+def test_spearman_reranks_bootstrap_resamples():
+    # A resample counts how often each row was drawn; it ranks as the
+    # sample with every row repeated that many times
+    x, y = matrices()
+    counts = np.random.default_rng(1).multinomial(len(x), np.full(len(x), 1.0 / len(x)), size=3)
+    r = spearman(x, y, np.ones(len(x)), counts.astype("float64"))
+    for resample, drawn in enumerate(counts):
+        rows = np.repeat(np.arange(len(x)), drawn)
+        np.testing.assert_allclose(r[resample], pandas_spearman(x[rows], y[rows]), atol=1e-12)
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from crime_dashboard.dataset import Dataset, DatasetMutatedError
+
+
+def make_dataset():
+    crimes = pd.DataFrame({
+        "CrimeRate": pd.Series([0.1, 0.2, 0.3], dtype="float32"),
+        "DistrictName": pd.Categorical(["צפון", "חיפה", "צפון"]),
+        "DistrictNameEn": pd.Categorical(["North", "Haifa", "North"]),
+    })
+    education = pd.DataFrame({"Settlement": pd.Categorical(["a", "b"]), "NumResidents": [10, 20]})
+    return Dataset.from_frames(education, crimes, "v1")
+
+
+def test_untouched_dataset_verifies():
+    dataset = make_dataset()
+    dataset.crimes["CrimeRate"].sum()
+    dataset.crimes.groupby("DistrictNameEn", observed=True)["CrimeRate"].mean()
+    dataset.verify()
+
+
+def test_in_place_write_raises():
+    dataset = make_dataset()
+    with pytest.raises(ValueError):
+        dataset.crimes["CrimeRate"].to_numpy()[0] = 1.0
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda crimes: crimes.__setitem__("CrimeRate", crimes["CrimeRate"] * 100),
+    lambda crimes: crimes.__setitem__("DistrictNameEn", crimes["DistrictName"]),
+    lambda crimes: crimes.__setitem__("DistrictNameEn", crimes["DistrictNameEn"].cat.rename_categories(
+        {"North": "Haifa", "Haifa": "North"})),
+    lambda crimes: crimes.drop(columns="CrimeRate", inplace=True),
+    lambda crimes: crimes.__setitem__("Extra", 1),
+], ids=["scale-values", "swap-categorical", "rename-categories", "drop-column", "add-column"])
+def test_mutations_are_caught(mutate):
+    dataset = make_dataset()
+    mutate(dataset.crimes)
+    with pytest.raises(DatasetMutatedError):
+        dataset.verify()
+
+
+def test_augmented_assignment_is_caught():
+    dataset = make_dataset()
+    crimes = dataset.crimes
+    crimes["CrimeRate"] *= 100
+    with pytest.raises(DatasetMutatedError):
+        dataset.verify()
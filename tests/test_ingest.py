@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+
+from crime_dashboard import ingest
+
+
+def write_raw(path, year, rows):
+    pd.DataFrame({
+        "Year": [year] * rows,
+        "Yeshuv": ["חיפה"] * rows,
+        "StatisticGroupKod": [1] * rows,
+        "StatisticGroup": ["עבירות רכוש"] * rows,
+    }).to_csv(path, index=False)
+
+
+def test_single_year_run_keeps_the_other_years_counts(tmp_path):
+    work_dir = str(tmp_path / "work")
+    first, second = str(tmp_path / "crimes2020.csv"), str(tmp_path / "crimes2021.csv")
+    write_raw(first, 2020, 3)
+    write_raw(second, 2021, 5)
+    ingest.update_counts([first, second], work_dir, log=lambda message: None)
+
+    # A run over only the new year keeps the state of the other one...
+    ingest.update_counts([second], work_dir, log=lambda message: None)
+    assert set(ingest.read_state(work_dir)) == {first, second}
+
+    # ...so the next full run reuses both
+    messages = []
+    counts = ingest.update_counts([first, second], work_dir, log=messages.append)
+    assert all("unchanged" in message for message in messages)
+    assert counts.groupby("Year")["Count"].sum().to_dict() == {2020: 3, 2021: 5}
+
+
+def test_deleted_raw_files_are_forgotten(tmp_path):
+    work_dir = str(tmp_path / "work")
+    first, second = str(tmp_path / "crimes2020.csv"), str(tmp_path / "crimes2021.csv")
+    write_raw(first, 2020, 3)
+    write_raw(second, 2021, 5)
+    ingest.update_counts([first, second], work_dir, log=lambda message: None)
+
+    os.remove(first)
+    ingest.update_counts([second], work_dir, log=lambda message: None)
+    assert set(ingest.read_state(work_dir)) == {second}
+    assert not os.path.exists(ingest.partial_path(first, work_dir))
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from crime_dashboard import prerender
+
+
+def test_a_directory_that_is_not_a_bundle_is_kept(tmp_path):
+    (tmp_path / "notes.txt").write_text("keep me")
+    with pytest.raises(ValueError):
+        prerender.prerender(str(tmp_path), top=1)
+    assert os.listdir(tmp_path) == ["notes.txt"]
+
+
+def test_a_new_bundle_replaces_the_old_one(tmp_path):
+    bundle_dir = str(tmp_path / "prerender")
+    for directory, view in [(bundle_dir, "old.json"), (bundle_dir + ".build", "new.json")]:
+        os.makedirs(directory)
+        for name in (prerender.MANIFEST_NAME, view):
+            open(os.path.join(directory, name), "w").close()
+    prerender.replace_bundle(bundle_dir + ".build", bundle_dir)
+    assert sorted(os.listdir(bundle_dir)) == sorted([prerender.MANIFEST_NAME, "new.json"])
+    assert os.listdir(tmp_path) == ["prerender"]
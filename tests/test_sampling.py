@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crime_dashboard.sampling import downsample, outlier_scores
+
+
+def scatter(rows=20000, seed=0):
+    # Two crime types on very different scales, over three years
+    rng = np.random.default_rng(seed)
+    crime_type = rng.choice(["Fraud", "Property"], rows)
+    scale = np.where(crime_type == "Fraud", 0.001, 0.05)
+    return pd.DataFrame({
+        "StatisticGroupEn": pd.Categorical(crime_type),
+        "Year": rng.choice([2022, 2023, 2024], rows).astype("int16"),
+        "Rate": rng.uniform(0, 1, rows).astype("float32"),
+        "CrimeRate": (rng.lognormal(0, 0.6, rows) * scale).astype("float32"),
+    })
+
+
+@pytest.mark.parametrize("max_points", [1, 10, 100, 1000, 5000])
+def test_result_is_capped(max_points):
+    frame = scatter()
+    result = downsample(frame, "Rate", "CrimeRate", max_points, groups=["StatisticGroupEn", "Year"])
+    assert len(result) <= max_points
+    assert result.index.is_monotonic_increasing
+
+
+def test_small_frames_are_returned_as_they_are():
+    frame = scatter(rows=50)
+    assert downsample(frame, "Rate", "CrimeRate", 100) is frame
+
+
+def test_outliers_are_found_per_series():
+    frame = scatter()
+    pooled = outlier_scores(frame, "CrimeRate") > 0
+    per_series = outlier_scores(frame, "CrimeRate", ["StatisticGroupEn", "Year"]) > 0
+    # Pooled, the low Fraud rates hide inside the Property spread
+    assert not (frame.loc[pooled, "StatisticGroupEn"] == "Fraud").any()
+    assert (frame.loc[per_series, "StatisticGroupEn"] == "Fraud").any()
+
+
+def test_most_extreme_outliers_are_kept_first():
+    frame = scatter()
+    frame.loc[0, "CrimeRate"] = 100.0
+    result = downsample(frame, "Rate", "CrimeRate", 50, groups=["StatisticGroupEn", "Year"])
+    assert 0 in result.index
+    assert len(result) <= 50
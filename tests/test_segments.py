@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from crime_dashboard.cube import rate_tables
+from crime_dashboard.segments import segment_rates
+
+
+def district_crimes():
+    # Two settlements of one district; only the first has a fraud row, both
+    # have the "all crimes" row (StatisticGroupKod == -2)
+    return pd.DataFrame({
+        "StatisticGroupEn": pd.Categorical(["Fraud Offenses", "All Crimes", "All Crimes"]),
+        "StatisticGroupKod": [5, -2, -2],
+        "DistrictNameEn": pd.Categorical(["North"] * 3),
+        "Settlement": pd.Categorical(["A", "A", "B"]),
+        "Year": pd.Series([2023] * 3, dtype="int16"),
+        "Count": [10, 40, 30],
+        "NumResidents": [1000, 1000, 4000],
+        "CrimeRate": [0.01, 0.04, 0.0075],
+    })
+
+
+def test_weighted_rate_counts_settlements_without_the_crime_type():
+    tables = rate_tables(district_crimes(), "DistrictNameEn", "weighted")
+    # 10 frauds among the 5000 residents of both settlements
+    assert tables["Fraud Offenses"].loc["North", 2023] == pytest.approx(10 / 5000)
+    assert tables["All Crimes"].loc["North", 2023] == pytest.approx(70 / 5000)
+
+
+def test_weighted_rate_defaults_to_the_groups_rows():
+    rates = segment_rates(district_crimes(), ["StatisticGroupEn", "DistrictNameEn", "Year"], "weighted")
+    assert rates.loc[("Fraud Offenses", "North", 2023)] == pytest.approx(10 / 1000)
@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from crime_dashboard import data, storage
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    # The cache of copies of the two source files, so the test can change them
+    crimes_path = str(tmp_path / "crimes.csv")
+    pd.read_csv(data.CRIMES_PATH).query("Year >= 2023").to_csv(crimes_path, index=False)
+    education_path = str(tmp_path / "education.xlsx")
+    shutil.copy(data.EDUCATION_PATH, education_path)
+    monkeypatch.setitem(storage.SOURCES, "crimes", (crimes_path, storage.read_crimes))
+    monkeypatch.setitem(storage.SOURCES, "education", (education_path, storage.read_education))
+    return crimes_path, str(tmp_path / "cache")
+
+
+def change_counts(crimes_path, add):
+    crimes = pd.read_csv(crimes_path)
+    crimes["Count"] += add
+    crimes.to_csv(crimes_path, index=False)
+
+
+def test_versions_load_their_own_files(sources):
+    crimes_path, cache_dir = sources
+    first = storage.data_version(cache_dir)
+    first_crimes = storage.load_version(first, cache_dir)[1]
+
+    # A new version is built next to the one being served...
+    change_counts(crimes_path, 1)
+    second = storage.data_version(cache_dir)
+    assert second != first
+    second_crimes = storage.load_version(second, cache_dir)[1]
+    assert (second_crimes["Count"] == first_crimes["Count"] + 1).all()
+
+    # ...which still loads as it was
+    pd.testing.assert_frame_equal(storage.load_version(first, cache_dir)[1], first_crimes)
+    summaries = [storage.read_summary(cache_dir, version=version) for version in (first, second)]
+    assert summaries[0]["years"] != summaries[1]["years"]
+
+
+def test_only_the_last_versions_are_kept(sources):
+    crimes_path, cache_dir = sources
+    versions = [storage.data_version(cache_dir)]
+    storage.load_version(versions[0], cache_dir)
+    for add in (1, 2):
+        change_counts(crimes_path, add)
+        versions.append(storage.data_version(cache_dir))
+        storage.load_version(versions[-1], cache_dir)
+
+    with pytest.raises(LookupError):
+        storage.load_version(versions[0], cache_dir)
+    storage.load_version(versions[1], cache_dir)
+    files = os.listdir(os.path.join(cache_dir, "crimes"))
+    assert len(files) == storage.KEEP_VERSIONS * 2